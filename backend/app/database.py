@@ -1,4 +1,6 @@
 # Database setup
+import os
+from sqlalchemy import Index, inspect
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.types import JSON
@@ -6,7 +8,7 @@ from typing import Optional
 import datetime
 
 # Database setup
-SQLALCHEMY_DATABASE_URL = "sqlite+aiosqlite:///./triage.db"
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./triage.db")
 
 engine = create_async_engine(SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=AsyncSession)
@@ -47,10 +49,57 @@ class PatientRecord(Base):
     recommended_department: Mapped[str] = mapped_column()
     is_active: Mapped[bool] = mapped_column(default=True) # False if discharged
     created_at: Mapped[datetime.datetime] = mapped_column(default=datetime.datetime.utcnow)
-    user_id: Mapped[Optional[int]] = mapped_column(index=True)
+    user_id: Mapped[Optional[int]] = mapped_column()  # Indexed by ix_patients_user_created
     reasoning_summary: Mapped[Optional[str]] = mapped_column()
     explainability: Mapped[Optional[dict]] = mapped_column(type_=JSON)
+    symptoms: Mapped[Optional[list]] = mapped_column(type_=JSON(none_as_null=True))  # NULL: admitted before it existed
+
+    # One index per hot access path, so none of them scans or sorts the whole table
+    __table_args__ = (
+        # Today's admissions (department load balancing on every add_patient)
+        Index("ix_patients_created_at", "created_at"),
+        # Active queue in priority order: equality on is_active, then rows already in ORDER BY order
+        Index("ix_patients_active_priority", "is_active", priority_score.desc(), "created_at"),
+        # Admin list / export filtered by risk level
+        Index("ix_patients_risk_level", "risk_level"),
+        # A patient's latest record (patient dashboard); also serves user_id lookups on their own
+        Index("ix_patients_user_created", "user_id", created_at.desc()),
+    )
+
+# Columns added after the first release: create_all does not alter existing tables
+_ADDED_COLUMNS = {"patients": {"symptoms": "JSON"}}
+# Indexes superseded by a composite one with the same leading column (pure write overhead)
+_DROPPED_INDEXES = {"patients": ["ix_patients_user_id"]}
+
+
+def _add_missing_columns(conn) -> None:
+    inspector = inspect(conn)
+    for table, columns in _ADDED_COLUMNS.items():
+        existing = {c["name"] for c in inspector.get_columns(table)}
+        for name, ddl_type in columns.items():
+            if name not in existing:
+                conn.exec_driver_sql(f"ALTER TABLE {table} ADD COLUMN {name} {ddl_type}")
+
+def _sync_indexes(conn) -> None:
+    """Create indexes declared after a table already existed (create_all skips existing tables entirely)."""
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for name in _DROPPED_INDEXES.get(table.name, []):
+            if name in existing:
+                conn.exec_driver_sql(f"DROP INDEX {name}")
+        for index in table.indexes:
+            if index.name not in existing:
+                print(f"Creating index {index.name} on {table.name}")
+                index.create(conn)
+
 
 async def init_db():
     async with engine.begin() as conn:
+        if engine.dialect.name == "sqlite":
+            # Same journal mode as the shipped triage.db; a fresh file would otherwise use the rollback
+            # journal, where concurrent admissions fail with "database is locked"
+            await conn.exec_driver_sql("PRAGMA journal_mode=WAL")
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
+        await conn.run_sync(_sync_indexes)
@@ -0,0 +1,89 @@
+"""Bounded executor for CPU-bound inference, so scoring never blocks the asyncio event loop."""
+
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.metrics import LabeledHistogram
+
+INFERENCE_POOL_SIZE = int(os.getenv("INFERENCE_POOL_SIZE", "4"))
+# Max calls admitted at once (running + queued); beyond this callers get InferenceOverloaded
+INFERENCE_MAX_PENDING = int(os.getenv("INFERENCE_MAX_PENDING", "64"))
+
+
+class InferenceOverloaded(Exception):
+    """Raised when the inference queue is full (backpressure: the caller should retry later)."""
+
+
+class InferencePool:
+    """
+    Thread pool with a hard cap on pending work. `pending` is only changed on the event loop
+    thread; `running` is changed by workers under a lock.
+    """
+
+    def __init__(self, workers: int = INFERENCE_POOL_SIZE, max_pending: int = INFERENCE_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._peak_pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._queue_wait_total = 0.0
+        self.call_seconds = LabeledHistogram(
+            "inference_call_duration_seconds", "Time on an inference pool thread per call, by function.",
+            ("function",), [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5],
+        )
+
+    async def run(self, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) on a pool thread; raises InferenceOverloaded when full."""
+        if self._pending >= self.max_pending:
+            self._rejected += 1
+            raise InferenceOverloaded(f"{self._pending} inference calls pending (limit {self.max_pending})")
+        self._pending += 1
+        self._peak_pending = max(self._peak_pending, self._pending)
+        loop = asyncio.get_running_loop()
+        call = functools.partial(self._call, fn, args, kwargs, time.perf_counter())
+        try:
+            return await loop.run_in_executor(self._executor, call)
+        finally:
+            self._pending -= 1
+
+    def _call(self, fn, args, kwargs, submitted_at: float):
+        with self._lock:
+            self._running += 1
+            self._queue_wait_total += time.perf_counter() - submitted_at
+        started = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.call_seconds.observe(time.perf_counter() - started, getattr(fn, "__name__", "unknown"))
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            running, completed, wait_total = self._running, self._completed, self._queue_wait_total
+        return {
+            "pool_size": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "running": running,
+            "queue_depth": max(0, self._pending - running),
+            "peak_pending": self._peak_pending,
+            "completed": completed,
+            "rejected": self._rejected,
+            "avg_queue_wait_ms": round(1000 * wait_total / completed, 3) if completed else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+inference_pool = InferencePool()
@@ -0,0 +1,110 @@
+"""Micro-batching scheduler: coalesces concurrent admissions into one vectorized model + SHAP call."""
+
+import asyncio
+import os
+import time
+
+from app.inference_pool import InferencePool, inference_pool
+from app.metrics import Histogram
+from ml.inference import explain_inferences, predict_risk_batch
+
+# How long the first request of a batch waits for company, and the batch size that flushes early
+INFERENCE_BATCH_WINDOW_MS = float(os.getenv("INFERENCE_BATCH_WINDOW_MS", "3"))
+INFERENCE_MAX_BATCH = int(os.getenv("INFERENCE_MAX_BATCH", "32"))
+
+
+def score_batch(patients: list[dict]) -> list[tuple[dict, list[dict] | None]]:
+    """predict_risk result and SHAP contributions for each patient, from one batched call of each."""
+    preds = predict_risk_batch(patients)
+    shap_contribs = explain_inferences([p["inference"] for p in preds])
+    return list(zip(preds, shap_contribs))
+
+
+class InferenceScheduler:
+    """
+    Collects submit() calls for up to `window_ms` (or until `max_batch` are waiting), then scores
+    them with score_batch on the inference pool and resolves each caller with its own row.
+    Runs entirely on the event loop thread, so no locking is needed around the pending list.
+    """
+
+    def __init__(
+        self,
+        pool: InferencePool = inference_pool,
+        window_ms: float = INFERENCE_BATCH_WINDOW_MS,
+        max_batch: int = INFERENCE_MAX_BATCH,
+    ):
+        self.pool = pool
+        self.window_ms = window_ms
+        self.max_batch = max_batch
+        self._pending: list[tuple[dict, asyncio.Future, float]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        # The loop only holds tasks weakly; an uncollected batch task is what resolves its callers
+        self._inflight: set[asyncio.Task] = set()
+        self.batch_size = Histogram([1, 2, 4, 8, 16, 32, 64, 128])
+        self.wait_ms = Histogram([0.5, 1, 2, 3, 5, 10, 25, 50, 100])
+
+    async def submit(self, patient: dict) -> tuple[dict, list[dict] | None]:
+        """Score one patient (predict_risk keyword arguments) as part of the next batch."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((patient, future, time.perf_counter()))
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window_ms / 1000, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        now = time.perf_counter()
+        self.batch_size.observe(len(batch))
+        for _, _, enqueued_at in batch:
+            self.wait_ms.observe(1000 * (now - enqueued_at))
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _run(self, batch: list[tuple[dict, asyncio.Future, float]]) -> None:
+        try:
+            results = await self.pool.run(score_batch, [patient for patient, _, _ in batch])
+        except asyncio.CancelledError:
+            for _, future, _ in batch:
+                future.cancel()
+            raise
+        except Exception as e:
+            for _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def shutdown(self) -> None:
+        """Cancel waiting and in-flight batches; their callers get CancelledError instead of hanging."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        for _, future, _ in batch:
+            future.cancel()
+        for task in list(self._inflight):
+            task.cancel()
+
+    def metrics(self) -> dict:
+        return {
+            "window_ms": self.window_ms,
+            "max_batch": self.max_batch,
+            "waiting": len(self._pending),
+            "inflight": len(self._inflight),
+            "batch_size": self.batch_size.snapshot(),
+            "wait_ms": self.wait_ms.snapshot(),
+        }
+
+
+inference_scheduler = InferenceScheduler()
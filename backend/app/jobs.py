@@ -0,0 +1,337 @@
+"""Background training jobs: train()/refresh() run in a separate worker process, progress and logs stream back."""
+
+import contextlib
+import json
+import multiprocessing
+import os
+import shutil
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from ml.registry import MODEL_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows: jobs are only serialized within one API process
+    fcntl = None
+
+JOBS_DIR = MODEL_DIR / "jobs"  # <id>.json job records, <id>/ staging dirs the worker trains into
+LOCK_FILE = ".lock"  # In JOBS_DIR; flock'ed while a job trains, so one job runs at a time across API processes
+JOB_LOG_LINES = int(os.getenv("JOB_LOG_LINES", "200"))  # Last log lines kept per job
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", "50"))  # Finished job records kept for GET /api/admin/jobs
+# Niceness added to the worker process, so the fit yields CPU to request handling
+JOB_NICE = int(os.getenv("JOB_NICE", "10"))
+
+_events = None  # Worker side: queue back to the API process, set by _init_worker
+
+
+class _QueueWriter:
+    """stdout/stderr replacement in the worker: each complete line becomes a job log event."""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self._buffer = ""
+
+    def write(self, text: str) -> int:
+        self._buffer += text
+        *lines, self._buffer = self._buffer.split("\n")
+        for line in lines:
+            if line.strip():
+                _events.put(("log", self.job_id, line))
+        return len(text)
+
+    def flush(self) -> None:
+        pass
+
+
+def _init_worker(events) -> None:
+    global _events
+    _events = events
+    if JOB_NICE and hasattr(os, "nice"):
+        os.nice(JOB_NICE)
+
+
+def _train_job(job_id: str, kind: str, staging_dir: str, params: dict) -> dict:
+    """Runs in the worker process: train() or refresh() into staging_dir, never touching the live model."""
+    from ml.train_model import refresh, train
+
+    sys.stdout = sys.stderr = _QueueWriter(job_id)
+    common = dict(
+        model_dir=Path(staging_dir),
+        publish=False,
+        n_jobs=-1,  # All cores for the fit; the API process keeps its own GIL
+        # Up to 0.9: publishing in the API process is the last step
+        progress=lambda stage, fraction: _events.put(
+            ("progress", job_id, "trained" if stage == "done" else stage, 0.9 * fraction)
+        ),
+    )
+    if kind == "refresh":
+        _, _, summary = refresh(**common)  # Base: the version live in the store right now
+    else:
+        _, _, summary = train(
+            n_samples=params["n_samples"],
+            seed=params["seed"],
+            save_dataset=params["save_dataset"],
+            history=params.get("history", False),
+            **common,
+        )
+    return summary
+
+
+class Job:
+    """State of one job; mutated only under JobManager's lock, which also writes it to JOBS_DIR/<id>.json."""
+
+    def __init__(self, kind: str, params: dict):
+        self.id = uuid.uuid4().hex[:12]
+        self.pid = os.getpid()  # API process that accepted (and will run) the job
+        self.kind = kind
+        self.params = params
+        self.status = "queued"  # queued -> running -> succeeded | failed
+        self.stage: str | None = None
+        self.progress = 0.0
+        self.logs: deque[str] = deque(maxlen=JOB_LOG_LINES)
+        self.summary: dict | None = None
+        self.error: str | None = None
+        self.created_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("succeeded", "failed")
+
+    def to_record(self) -> dict:
+        record = {name: getattr(self, name) for name in _RECORD_FIELDS}
+        record["logs"] = list(self.logs)
+        return record
+
+    @classmethod
+    def from_record(cls, record: dict) -> "Job":
+        job = cls.__new__(cls)
+        for name in _RECORD_FIELDS:
+            setattr(job, name, record.get(name))
+        job.logs = deque(record.get("logs", []), maxlen=JOB_LOG_LINES)
+        if not job.finished and not _process_alive(job.pid):
+            # The API process that owned the job exited (restart, crash) before it finished
+            job.status, job.error = "failed", job.error or "API process exited before the job finished"
+        return job
+
+    def snapshot(self, include_logs: bool = True) -> dict:
+        out = {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "summary": self.summary,
+            "error": self.error,
+            "created_at": _iso(self.created_at),
+            "started_at": _iso(self.started_at),
+            "finished_at": _iso(self.finished_at),
+            "duration_s": round((self.finished_at or time.time()) - self.started_at, 1) if self.started_at else None,
+        }
+        if include_logs:
+            out["logs"] = list(self.logs)
+        return out
+
+
+_RECORD_FIELDS = (
+    "id", "pid", "kind", "params", "status", "stage", "progress", "summary", "error",
+    "created_at", "started_at", "finished_at",
+)
+
+
+def _iso(ts: float | None) -> str | None:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts)) if ts else None
+
+
+def _process_alive(pid: int | None) -> bool:
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Exists, owned by another user
+    return True
+
+
+class JobManager:
+    """
+    Runs one training job at a time. A single jobs thread submits each job to a one-process
+    ProcessPoolExecutor (spawned, not forked, so no inference threads or model state are
+    inherited), waits for it, then publishes the result in this process: installs and hot-swaps
+    the live model, or registers it as the shadow candidate. Worker progress and log lines arrive
+    on a multiprocessing queue drained by a listener thread.
+
+    With several uvicorn workers each has its own JobManager. Every change to a job is written
+    to JOBS_DIR/<id>.json, so any worker can report any job, and a job only starts training once
+    it holds the flock on JOBS_DIR/.lock, so jobs accepted by different workers queue behind
+    each other instead of running fits side by side.
+    """
+
+    def __init__(self, staging_root: Path = JOBS_DIR):
+        self.staging_root = staging_root
+        self._jobs: dict[str, Job] = {}  # Jobs this process has accepted and not yet finished
+        self._lock = threading.Lock()
+        self._runner = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jobs")
+        self._ctx = multiprocessing.get_context("spawn")
+        self._events = None
+        self._processes: ProcessPoolExecutor | None = None
+
+    def submit(self, kind: str, **params) -> Job:
+        job = Job(kind, params)
+        self.staging_root.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._save(job)
+        self._prune()
+        self._runner.submit(self._run, job)
+        return job
+
+    def _record_path(self, job_id: str) -> Path:
+        return self.staging_root / f"{job_id}.json"
+
+    def _save(self, job: Job) -> None:
+        """Write the job record (caller holds self._lock); replaced atomically so readers never see half a file."""
+        path = self._record_path(job.id)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(job.to_record(), f)
+        os.replace(tmp, path)
+
+    def _load(self, path: Path) -> Job | None:
+        try:
+            with open(path) as f:
+                return Job.from_record(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None  # Pruned meanwhile
+
+    def snapshot(self, job_id: str) -> dict | None:
+        """Job status from its record, whichever API process accepted it."""
+        if Path(job_id).name != job_id or job_id.startswith("."):
+            return None
+        job = self._load(self._record_path(job_id))
+        return job.snapshot() if job is not None else None
+
+    def _records(self) -> list[Job]:
+        jobs = [self._load(path) for path in self.staging_root.glob("*.json")] if self.staging_root.exists() else []
+        return sorted((job for job in jobs if job is not None), key=lambda job: job.created_at, reverse=True)
+
+    def snapshots(self) -> list[dict]:
+        """All retained jobs, newest first, without logs."""
+        return [job.snapshot(include_logs=False) for job in self._records()]
+
+    def _prune(self) -> None:
+        """Delete the oldest finished job records beyond JOB_HISTORY."""
+        records = self._records()
+        finished = [job.id for job in reversed(records) if job.finished]
+        for job_id in finished[: max(0, len(records) - JOB_HISTORY)]:
+            self._record_path(job_id).unlink(missing_ok=True)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._events is None:
+            self._events = self._ctx.Queue()
+            threading.Thread(target=self._listen, args=(self._events,), name="jobs-events", daemon=True).start()
+        if self._processes is None:
+            self._processes = ProcessPoolExecutor(
+                max_workers=1, mp_context=self._ctx, initializer=_init_worker, initargs=(self._events,)
+            )
+        return self._processes
+
+    def _listen(self, events) -> None:
+        while True:
+            event = events.get()
+            if event is None:
+                return
+            kind, job_id, *payload = event
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is None:
+                    continue
+                if kind == "progress":
+                    stage, fraction = payload
+                    if fraction < job.progress:
+                        continue  # Late events never move a job backwards
+                    job.stage, job.progress = stage, fraction
+                else:
+                    job.logs.append(payload[0])
+                self._save(job)
+
+    def _update(self, job: Job, **fields) -> None:
+        with self._lock:
+            for name, value in fields.items():
+                setattr(job, name, value)
+            if job.finished and job.finished_at is not None:
+                self._jobs.pop(job.id, None)
+            self._save(job)
+
+    def _log(self, job: Job, line: str) -> None:
+        print(f"[job {job.id}] {line}")
+        with self._lock:
+            job.logs.append(line)
+            self._save(job)
+
+    @contextlib.contextmanager
+    def _exclusive(self):
+        """Held for a whole job: blocks while a job accepted by any API process sharing JOBS_DIR trains."""
+        with open(self.staging_root / LOCK_FILE, "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)  # Released when f is closed
+            yield
+
+    def _run(self, job: Job) -> None:
+        with self._exclusive():
+            self._train(job)
+
+    def _train(self, job: Job) -> None:
+        staging = self.staging_root / job.id
+        self._update(job, status="running", started_at=time.time())
+        try:
+            summary = self._pool().submit(_train_job, job.id, job.kind, str(staging), job.params).result()
+            if summary.get("refreshed", True):
+                self._update(job, stage="publish", progress=0.95)
+                self._publish(job, staging)
+            else:
+                self._log(job, "No new patient rows since the last checkpoint; live model unchanged")
+            self._update(job, status="succeeded", stage="done", progress=1.0, summary=summary)
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                self._processes = None  # Worker died (e.g. OOM); the next job gets a fresh one
+            self._log(job, f"Failed: {e!r}")
+            self._update(job, status="failed", error=str(e) or repr(e))
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+            self._update(job, finished_at=time.time())
+
+    def _publish(self, job: Job, staging: Path) -> None:
+        """Add the staged model to the artifact store and make it live, or register it as the shadow candidate."""
+        from ml.registry import registry
+
+        if job.params.get("shadow"):
+            from app.shadow import shadow
+
+            version = registry.store.add(staging, move=True)
+            shadow.stage(version)
+            self._log(job, f"Registered as shadow candidate {version}")
+            return
+        version = registry.publish(staging, move=True)
+        self._log(job, f"Model {version} is live")
+
+    def shutdown(self) -> None:
+        self._runner.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+        if self._events is not None:
+            self._events.put(None)
+
+
+jobs = JobManager()
@@ -1,15 +1,22 @@
 import os
 import json
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
 from typing import List, Dict, Any
 
 # Ensure environment variables are loaded
 load_dotenv()
 
-# Initialize OpenAI client
 api_key = os.getenv("OPENAI_API_KEY")
-client = AsyncOpenAI(api_key=api_key) if api_key else None
+_client = None
+
+
+def get_client():
+    """OpenAI client, created on first use (the openai package is only imported then); None without a key."""
+    global _client
+    if _client is None and api_key:
+        from openai import AsyncOpenAI
+        _client = AsyncOpenAI(api_key=api_key)
+    return _client
 
 SAFETY_SYSTEM_PROMPT = """
 You are a highly experienced clinical explanation assistant for a triage system.
@@ -31,6 +38,7 @@ async def explain_risk_assessment(context: Dict[str, Any], language: str = "en")
     Generates a structured explanation of the risk assessment using OpenAI.
     """
     try:
+        client = get_client()
         if not client:
             raise ValueError("OpenAI API Key not set")
 
@@ -96,6 +104,7 @@ async def medical_chat(history: List[Dict[str, str]], language: str = "en") -> s
     Handles general medical Q&A with safety guardrails.
     """
     try:
+        client = get_client()
         if not client:
             return "I apologize, but I cannot process this request at the moment. Please contact a nurse."
 
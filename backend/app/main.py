@@ -1,5 +1,6 @@
 """FastAPI app: patient input, risk classification, department recommendation, dashboard."""
 
+import asyncio
 import csv
 import io
 from datetime import datetime
@@ -13,24 +14,33 @@ from typing import Optional, List, Any
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, File, HTTPException, Query, UploadFile, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 
 from app.chat import chat_turn
-from app.database import init_db, PatientRecord, User
+from app.database import engine, init_db, PatientRecord, User
 from app.auth import get_db, get_password_hash, verify_password, create_access_token, get_current_user, get_current_admin
 from app.department import recommend_department, risk_to_priority_score
 from app.ehr import process_ehr_upload
 from app.fairness import compute_fairness_metrics
+from app.inference_pool import InferenceOverloaded, inference_pool
+from app.inference_scheduler import inference_scheduler
+from app.jobs import jobs
 from app.load_balancing import get_department_status, route_with_load_balancing
+from app.metrics import PROMETHEUS_CONTENT_TYPE
 from app.severity_timeline import predict_severity_timeline
+from app.shadow import shadow
+from app.prometheus import PrometheusMiddleware, instrument_engine, render as render_prometheus
 from app.simulation import generate_random_patient
+from app.stage_timing import STAGE_TIMING_ENABLED, StageTimingMiddleware, stage, stage_metrics
 from app.schemas import (
     Explainability,
     Gender,
+    PatientBatchCreate,
+    PatientBatchResponse,
     PatientCreate,
     PatientResponse,
     ProbabilityBreakdown,
@@ -40,7 +50,12 @@ from app.schemas import (
     PatientUpdate,
 )
 from app.validation import get_abnormality_alerts
-from ml.inference import get_explainability, predict_risk
+from app.warmup import readiness
+from ml.artifact_store import StaleRollbackError, artifact_store
+from ml.columnar_dataset import read_summary as read_dataset_summary
+from ml.inference import explain_inferences, get_explainability, predict_risk, predict_risk_batch
+from ml.prediction_cache import prediction_cache
+from ml.registry import registry
 import secrets
 import string
 
@@ -51,7 +66,15 @@ def generate_temp_password(length=12):
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await init_db()
+    shadow.restore()
+    # Warm the model in the background: /health answers at once, /ready only once this is done
+    warmup_task = asyncio.create_task(readiness.warm())
     yield
+    warmup_task.cancel()
+    inference_scheduler.shutdown()
+    inference_pool.shutdown()
+    shadow.shutdown()
+    jobs.shutdown()
 
 app = FastAPI(title="Triage API", version="1.0", lifespan=lifespan)
 
@@ -61,7 +84,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing"],
 )
+if STAGE_TIMING_ENABLED:
+    app.add_middleware(StageTimingMiddleware)
+app.add_middleware(PrometheusMiddleware)
+instrument_engine(engine)
 
 # Auth Endpoints
 class UserCreate(BaseModel):
@@ -158,97 +186,100 @@ def _update_estimated_waits(store: list[dict]) -> None:
 
 
 
-@app.post("/api/patients", response_model=PatientResponse)
-async def add_patient(
-    data: PatientCreate, 
-    db: AsyncSession = Depends(get_db),
-    current_user: Optional[User] = Depends(get_current_user)
-):
-    """Add patient: validate, predict risk, recommend department, build explainability."""
-    alerts = get_abnormality_alerts(
-        heart_rate=data.heart_rate,
-        blood_pressure_systolic=data.blood_pressure_systolic,
-        blood_pressure_diastolic=data.blood_pressure_diastolic,
-        temperature=data.temperature,
-        spo2=data.spo2,
-        respiratory_rate=data.respiratory_rate,
+def _today_start() -> datetime:
+    return datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+async def _todays_patients(db: AsyncSession) -> list[dict]:
+    """Today's records as dicts (input to department load balancing)."""
+    result = await db.execute(select(PatientRecord).filter(PatientRecord.created_at >= _today_start()))
+    return [p.__dict__ for p in result.scalars().all()]
+
+
+def _prediction_kwargs(data: PatientCreate) -> dict:
+    """Model inputs for one intake payload (keyword arguments of predict_risk)."""
+    return {
+        "age": data.age,
+        "gender": data.gender.value,
+        "heart_rate": data.heart_rate,
+        "blood_pressure_systolic": data.blood_pressure_systolic,
+        "blood_pressure_diastolic": data.blood_pressure_diastolic,
+        "temperature": data.temperature,
+        "spo2": data.spo2,
+        "chronic_disease_count": data.chronic_disease_count,
+        "respiratory_rate": data.respiratory_rate,
+        "pain_score": data.pain_score,
+        "symptom_duration": data.symptom_duration,
+        "symptoms": data.symptoms,
+    }
+
+
+async def _run_inference(fn, *args, **kwargs):
+    """Run model scoring / explanation on the bounded inference pool, mapping failures to HTTP errors."""
+    return await _inference_http_errors(inference_pool.run(fn, *args, **kwargs))
+
+
+def _overloaded_error() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Triage scoring is at capacity. Please retry shortly.",
+        headers={"Retry-After": "1"},
     )
+
+
+async def _inference_http_errors(call):
+    """Await an inference call, turning a missing model or a full queue into 503s."""
     try:
-        pred = predict_risk(
-            age=data.age,
-            gender=data.gender.value,
-            heart_rate=data.heart_rate,
-            blood_pressure_systolic=data.blood_pressure_systolic,
-            blood_pressure_diastolic=data.blood_pressure_diastolic,
-            temperature=data.temperature,
-            spo2=data.spo2,
-            chronic_disease_count=data.chronic_disease_count,
-            respiratory_rate=data.respiratory_rate,
-            pain_score=data.pain_score,
-            symptom_duration=data.symptom_duration,
-            symptoms=data.symptoms,
-        )
+        return await call
     except FileNotFoundError:
         raise HTTPException(
             status_code=503,
             detail="ML model not loaded. Run: python -m ml.train_model from backend directory.",
         )
-    risk_level = pred["risk_level"]
-    prob_breakdown = pred["probability_breakdown"]
-    confidence = pred["confidence_score"]
-    preferred_dept, reasoning = recommend_department(risk_level, data.symptoms)
-    
-    # Load balancing (requires list of patients - fetch from DB for "today")
-    today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    result = await db.execute(select(PatientRecord).filter(PatientRecord.created_at >= today_start))
-    today_patients = [p.__dict__ for p in result.scalars().all()]
-    
-    routed_dept, routing_message = route_with_load_balancing(preferred_dept, risk_level, today_patients)
-    dept = routed_dept
-    if routing_message:
-        reasoning = reasoning + " " + routing_message
-        
-    priority = risk_to_priority_score(risk_level, confidence)
-    
-    # AI Explanation Integration
-    ai_res = None
-    if os.getenv("OPENAI_API_KEY"):
-        try:
-            from app.llm import explain_risk_assessment
-            ai_context = {
-                "risk_level": risk_level,
-                "heart_rate": data.heart_rate,
-                "blood_pressure_systolic": data.blood_pressure_systolic,
-                "blood_pressure_diastolic": data.blood_pressure_diastolic,
-                "spo2": data.spo2,
-                "symptoms": data.symptoms,
-                "recommended_department": dept
-            }
-            ai_res = await explain_risk_assessment(ai_context)
-            # Update reasoning with AI output
-            reasoning = ai_res.get("department_reasoning", reasoning)
-        except Exception as e:
-            print(f"AI Generation Failed: {e}")
+    except InferenceOverloaded:
+        raise _overloaded_error()
 
-    expert_system_explain = get_explainability(
-        age=data.age,
-        gender=data.gender.value,
+
+def _submit_shadow(patient_kwargs: list[dict], preds: list[dict]) -> None:
+    """Hand scored admissions to the shadow candidate, if one is loaded (never waits)."""
+    if preds:
+        shadow.submit(patient_kwargs, [p["inference"].probabilities for p in preds], preds[0]["inference"].bundle)
+
+
+def _abnormality_alerts(data: PatientCreate):
+    return get_abnormality_alerts(
         heart_rate=data.heart_rate,
         blood_pressure_systolic=data.blood_pressure_systolic,
         blood_pressure_diastolic=data.blood_pressure_diastolic,
         temperature=data.temperature,
         spo2=data.spo2,
-        chronic_disease_count=data.chronic_disease_count,
         respiratory_rate=data.respiratory_rate,
-        pain_score=data.pain_score,
-        symptom_duration=data.symptom_duration,
-        symptoms=data.symptoms,
-        risk_level=risk_level,
-        recommended_department=dept,
     )
 
-    
-    # Merge AI results into explainability
+
+async def _ai_explanation(data: PatientCreate, risk_level: str, dept: str) -> Optional[dict]:
+    """OpenAI explanation for the triage result, or None when disabled or failing."""
+    if not os.getenv("OPENAI_API_KEY"):
+        return None
+    try:
+        from app.llm import explain_risk_assessment
+        ai_context = {
+            "risk_level": risk_level,
+            "heart_rate": data.heart_rate,
+            "blood_pressure_systolic": data.blood_pressure_systolic,
+            "blood_pressure_diastolic": data.blood_pressure_diastolic,
+            "spo2": data.spo2,
+            "symptoms": data.symptoms,
+            "recommended_department": dept
+        }
+        return await explain_risk_assessment(ai_context)
+    except Exception as e:
+        print(f"AI Generation Failed: {e}")
+        return None
+
+
+def _merge_ai_explanation(expert_system_explain: dict, ai_res: Optional[dict]) -> dict:
+    """Merge AI results into explainability."""
     final_explain_dict = expert_system_explain.copy()
     if ai_res:
         if ai_res.get("department_reasoning"):
@@ -265,45 +296,74 @@ async def add_patient(
         
         if ai_res.get("safety_disclaimer"):
              final_explain_dict["safety_disclaimer"] = ai_res.get("safety_disclaimer")
+    return final_explain_dict
 
 
-    severity_timeline = predict_severity_timeline(
+def _severity_timeline(data: PatientCreate, risk_level: str) -> str | None:
+    return predict_severity_timeline(
         risk_level=risk_level,
         spo2=data.spo2,
         heart_rate=data.heart_rate,
         temperature=data.temperature,
         blood_pressure_systolic=data.blood_pressure_systolic,
     )
-    
-    patient_id = _generate_patient_id()
-    
-    # Determine user ownership
-    target_user_id = None
-    
-    if data.email:
-        # Check if user exists
-        existing_user = (await db.execute(select(User).filter(User.email == data.email))).scalars().first()
-        if existing_user:
-            target_user_id = existing_user.id
+
+
+async def _resolve_owner_ids(
+    db: AsyncSession,
+    items: list[PatientCreate],
+    current_user: Optional[User],
+) -> list[Optional[int]]:
+    """
+    Determine user ownership per payload: by email (creating patient accounts as needed),
+    else the current user if they are a patient. Uses one lookup for all emails.
+    """
+    emails = {d.email for d in items if d.email}
+    users_by_email: dict[str, User] = {}
+    if emails:
+        result = await db.execute(select(User).filter(User.email.in_(emails)))
+        users_by_email = {u.email: u for u in result.scalars().all()}
+        new_users = []
+        for d in items:
+            if d.email and d.email not in users_by_email:
+                # Create new user for patient
+                new_user = User(
+                    username=d.email, # Use email as username
+                    email=d.email,
+                    full_name=d.full_name,
+                    hashed_password=get_password_hash("VitalPass123!"), # Temporary default password
+                    role="patient"
+                )
+                users_by_email[d.email] = new_user
+                new_users.append(new_user)
+        if new_users:
+            db.add_all(new_users)
+            await db.flush() # Get IDs without committing transaction yet
+
+    owner_ids: list[Optional[int]] = []
+    for d in items:
+        if d.email:
+            owner_ids.append(users_by_email[d.email].id)
+        elif current_user and current_user.role == 'patient':
+            # If no email provided, link to current user ONLY if they are a patient
+            owner_ids.append(current_user.id)
         else:
-            # Create new user for patient
-            new_user = User(
-                username=data.email, # Use email as username
-                email=data.email,
-                full_name=data.full_name,
-                hashed_password=get_password_hash("VitalPass123!"), # Temporary default password
-                role="patient"
-            )
-            db.add(new_user)
-            await db.flush() # Get ID without committing transaction yet
-            target_user_id = new_user.id
-    elif current_user:
-        # If no email provided, link to current user ONLY if they are a patient
-        if current_user.role == 'patient':
-            target_user_id = current_user.id
-        # If admin, we leave it unlinked (None) unless email was provided above
-
-    new_record = PatientRecord(
+            # If admin, we leave it unlinked (None) unless email was provided above
+            owner_ids.append(None)
+    return owner_ids
+
+
+def _new_patient_record(
+    data: PatientCreate,
+    patient_id: str,
+    risk_level: str,
+    priority: int,
+    dept: str,
+    reasoning: str,
+    user_id: Optional[int],
+    explainability: dict,
+) -> PatientRecord:
+    return PatientRecord(
         patient_id=patient_id,
         age=data.age,
         gender=data.gender.value,
@@ -320,24 +380,32 @@ async def add_patient(
         priority_score=priority,
         recommended_department=dept,
         reasoning_summary=reasoning,
-        user_id=target_user_id,
-        explainability=final_explain_dict
+        user_id=user_id,
+        explainability=explainability,
+        symptoms=list(data.symptoms),
     )
-    db.add(new_record)
-    await db.commit()
-    await db.refresh(new_record)
-    
-    # Prepare response
+
+
+def _patient_response(
+    data: PatientCreate,
+    patient_id: str,
+    created_at: datetime,
+    alerts: list,
+    pred: dict,
+    priority: int,
+    dept: str,
+    preferred_dept: str,
+    routing_message: str,
+    severity_timeline: str | None,
+    reasoning: str,
+    explainability: dict,
+) -> PatientResponse:
+    prob_breakdown = pred["probability_breakdown"]
     prob_model = ProbabilityBreakdown(
         low=prob_breakdown.get("low", 0),
         medium=prob_breakdown.get("medium", 0),
         high=prob_breakdown.get("high", 0),
     )
-    # The explainability object is already in final_explain_dict
-    # We can reconstruct it or just use the dict if schemas allow
-    patient_id = _generate_patient_id()
-    created_at = new_record.created_at.isoformat() + "Z"
- 
     record = {
         "patient_id": patient_id,
         "age": data.age,
@@ -354,8 +422,8 @@ async def add_patient(
         "symptom_duration": data.symptom_duration,
         "pre_existing_conditions": data.pre_existing_conditions,
         "abnormality_alerts": [a.model_dump() for a in alerts],
-        "risk_level": risk_level,
-        "confidence_score": confidence,
+        "risk_level": pred["risk_level"],
+        "confidence_score": pred["confidence_score"],
         "probability_breakdown": prob_model.model_dump(),
         "priority_score": priority,
         "recommended_department": dept,
@@ -364,12 +432,159 @@ async def add_patient(
         "severity_timeline": severity_timeline,
         "estimated_wait_minutes": None,
         "reasoning_summary": reasoning,
-        "explainability": final_explain_dict,
-        "created_at": created_at,
+        "explainability": explainability,
+        "created_at": created_at.isoformat() + "Z",
     }
     return PatientResponse(**record)
 
 
+@app.post("/api/patients", response_model=PatientResponse)
+async def add_patient(
+    data: PatientCreate, 
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user)
+):
+    """Add patient: validate, predict risk, recommend department, build explainability."""
+    with stage("alerts"):
+        alerts = _abnormality_alerts(data)
+    with stage("predict"):
+        # Coalesced with concurrent admissions into one batched model + SHAP call
+        pred, shap_contribs = await _inference_http_errors(inference_scheduler.submit(_prediction_kwargs(data)))
+        _submit_shadow([_prediction_kwargs(data)], [pred])
+    risk_level = pred["risk_level"]
+    confidence = pred["confidence_score"]
+    preferred_dept, reasoning = recommend_department(risk_level, data.symptoms)
+    
+    with stage("routing"):
+        # Load balancing (requires list of patients - fetch from DB for "today")
+        today_patients = await _todays_patients(db)
+        routed_dept, routing_message = route_with_load_balancing(preferred_dept, risk_level, today_patients)
+    dept = routed_dept
+    if routing_message:
+        reasoning = reasoning + " " + routing_message
+        
+    priority = risk_to_priority_score(risk_level, confidence)
+    
+    # AI Explanation Integration
+    with stage("ai"):
+        ai_res = await _ai_explanation(data, risk_level, dept)
+    if ai_res:
+        # Update reasoning with AI output
+        reasoning = ai_res.get("department_reasoning", reasoning)
+
+    explain_kwargs = dict(
+        **_prediction_kwargs(data),
+        risk_level=risk_level,
+        recommended_department=dept,
+        inference=pred["inference"],
+        shap_contributions=shap_contribs,
+    )
+    with stage("explain"):
+        if shap_contribs is not None:
+            expert_system_explain = get_explainability(**explain_kwargs)  # Cheap: SHAP already computed
+        else:
+            expert_system_explain = await _run_inference(get_explainability, **explain_kwargs)
+        final_explain_dict = _merge_ai_explanation(expert_system_explain, ai_res)
+
+    with stage("timeline"):
+        severity_timeline = _severity_timeline(data, risk_level)
+    
+    patient_id = _generate_patient_id()
+    
+    with stage("db_write"):
+        # Determine user ownership
+        target_user_id = (await _resolve_owner_ids(db, [data], current_user))[0]
+        new_record = _new_patient_record(
+            data, patient_id, risk_level, priority, dept, reasoning, target_user_id, final_explain_dict
+        )
+        db.add(new_record)
+        await db.commit()
+        await db.refresh(new_record)
+    
+    return _patient_response(
+        data, patient_id, new_record.created_at, alerts, pred, priority, dept, preferred_dept,
+        routing_message, severity_timeline, reasoning, final_explain_dict,
+    )
+
+
+@app.post("/api/patients/batch", response_model=PatientBatchResponse)
+async def add_patients_batch(
+    batch: PatientBatchCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: Optional[User] = Depends(get_current_user)
+):
+    """
+    Add many patients at once (mass-casualty intake): one feature matrix and one model call
+    for the whole batch, one load-balancing query, one commit.
+    """
+    items = batch.patients
+    patient_kwargs = [_prediction_kwargs(d) for d in items]
+    with stage("predict"):
+        preds = await _run_inference(predict_risk_batch, patient_kwargs)
+        _submit_shadow(patient_kwargs, preds)
+
+    with stage("routing"):
+        # Route in arrival order; each routed patient counts toward load for the ones after it
+        today_patients = await _todays_patients(db)
+        routed = []
+        for data, pred in zip(items, preds):
+            risk_level = pred["risk_level"]
+            preferred_dept, reasoning = recommend_department(risk_level, data.symptoms)
+            dept, routing_message = route_with_load_balancing(preferred_dept, risk_level, today_patients)
+            if routing_message:
+                reasoning = reasoning + " " + routing_message
+            today_patients.append({"recommended_department": dept, "risk_level": risk_level})
+            routed.append((preferred_dept, dept, routing_message, reasoning))
+
+    with stage("ai"):
+        ai_results = await asyncio.gather(
+            *(_ai_explanation(d, p["risk_level"], r[1]) for d, p, r in zip(items, preds, routed))
+        )
+    with stage("db_write"):
+        owner_ids = await _resolve_owner_ids(db, items, current_user)
+    with stage("explain"):
+        # SHAP for the whole batch in one explainer call
+        shap_batch = await _run_inference(explain_inferences, [p["inference"] for p in preds])
+
+    pending = []
+    for data, pred, (preferred_dept, dept, routing_message, reasoning), ai_res, user_id, shap_contribs in zip(
+        items, preds, routed, ai_results, owner_ids, shap_batch
+    ):
+        risk_level = pred["risk_level"]
+        if ai_res:
+            reasoning = ai_res.get("department_reasoning", reasoning)
+        priority = risk_to_priority_score(risk_level, pred["confidence_score"])
+        with stage("explain"):
+            expert_system_explain = get_explainability(
+                **_prediction_kwargs(data),
+                risk_level=risk_level,
+                recommended_department=dept,
+                inference=pred["inference"],
+                shap_contributions=shap_contribs,
+            )
+            final_explain_dict = _merge_ai_explanation(expert_system_explain, ai_res)
+        patient_id = _generate_patient_id()
+        record = _new_patient_record(
+            data, patient_id, risk_level, priority, dept, reasoning, user_id, final_explain_dict
+        )
+        pending.append((data, pred, record, priority, preferred_dept, dept, routing_message, reasoning, final_explain_dict))
+
+    with stage("db_write"):
+        db.add_all([p[2] for p in pending])
+        await db.flush()  # Populates created_at before commit expires the instances
+    with stage("timeline"):
+        responses = [
+            _patient_response(
+                data, record.patient_id, record.created_at, _abnormality_alerts(data), pred, priority, dept,
+                preferred_dept, routing_message, _severity_timeline(data, pred["risk_level"]), reasoning, explain,
+            )
+            for data, pred, record, priority, preferred_dept, dept, routing_message, reasoning, explain in pending
+        ]
+    with stage("db_write"):
+        await db.commit()
+    return PatientBatchResponse(patients=responses, total=len(responses))
+
+
 @app.get("/api/patients")
 async def list_patients(sort: str | None = "priority", db: AsyncSession = Depends(get_db)):
     """List all patients from DB."""
@@ -594,7 +809,8 @@ async def update_patient(
         # Re-run risk prediction
         try:
             # Need to ensure all required fields are present (fallback to existing record values)
-            pred = predict_risk(
+            pred = await inference_pool.run(
+                predict_risk,
                 age=record.age,
                 gender=record.gender,
                 heart_rate=record.heart_rate,
@@ -649,6 +865,9 @@ async def update_patient(
                 except Exception as e:
                     print(f"AI Re-Analysis Failed: {e}")
                 
+        except InferenceOverloaded:
+            # Committing the new vitals with the old risk and priority would misorder the queue
+            raise _overloaded_error()
         except Exception as e:
             print(f"Error re-calculating risk: {e}")
             # Continue with update even if ML fails
@@ -728,16 +947,16 @@ async def simulation_add(
     """Add simulated patient(s) to DB with Admin protection."""
     if req is None:
         req = SimulationAddRequest()
-    added: list[PatientResponse] = []
+    batch: list[PatientCreate] = []
     for _ in range(max(1, min(req.count, 20))):
         payload = generate_random_patient(force_high_risk=req.emergency_spike)
         try:
             payload["gender"] = Gender(payload["gender"])
         except ValueError:
             payload["gender"] = Gender.OTHER
-        patient_data = PatientCreate(**payload)
-        res = await add_patient(patient_data, db=db, current_user=current_admin)
-        added.append(res)
+        batch.append(PatientCreate(**payload))
+    res = await add_patients_batch(PatientBatchCreate(patients=batch), db=db, current_user=current_admin)
+    added = res.patients
     return {"added": len(added), "patients": [r.model_dump() for r in added]}
 
 
@@ -820,23 +1039,25 @@ async def admin_export_patients(
 @app.post("/api/admin/synthetic/regenerate")
 def admin_regenerate_synthetic(
     n_samples: int = Query(2500, ge=500, le=10000),
+    seed: int = Query(42, ge=0),
     current_admin: User = Depends(get_current_admin)
 ):
-    """Regenerate synthetic dataset and retrain model with Admin protection."""
-    try:
-        from ml.train_model import train
-        _, _, summary = train(n_samples=n_samples)
-        return {"ok": True, "summary": summary}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    """
+    Regenerate synthetic dataset and retrain model in a background job with Admin protection.
+    Returns immediately; poll GET /api/admin/jobs/{job_id} for progress and the summary.
+    """
+    job = jobs.submit("regenerate", n_samples=n_samples, seed=seed, save_dataset=True, shadow=False)
+    return _job_accepted(job)
 
 
 @app.get("/api/admin/synthetic/summary")
 def admin_synthetic_summary(current_admin: User = Depends(get_current_admin)):
-    """Last synthetic dataset / model summary from meta.json with Admin protection."""
+    """
+    Last synthetic dataset / model summary from meta.json with Admin protection. Dataset statistics
+    come from the columnar dataset's precomputed summary.json, never from re-reading the data.
+    """
     import json
-    from pathlib import Path
-    meta_path = Path(__file__).resolve().parent.parent / "ml" / "artifacts" / "meta.json"
+    meta_path = artifact_store.current_dir() / "meta.json"
     if not meta_path.exists():
         return {"error": "Model not trained yet", "summary": None}
     with open(meta_path) as f:
@@ -849,6 +1070,7 @@ def admin_synthetic_summary(current_admin: User = Depends(get_current_admin)):
             "version": meta.get("version"),
             "trained_at": meta.get("trained_at"),
         },
+        "dataset": read_dataset_summary(),
     }
 
 
@@ -856,8 +1078,7 @@ def admin_synthetic_summary(current_admin: User = Depends(get_current_admin)):
 def admin_model_info(current_admin: User = Depends(get_current_admin)):
     """Model version, accuracy, metadata with Admin protection."""
     import json
-    from pathlib import Path
-    meta_path = Path(__file__).resolve().parent.parent / "ml" / "artifacts" / "meta.json"
+    meta_path = artifact_store.current_dir() / "meta.json"
     if not meta_path.exists():
         return {"error": "Model not trained yet", "version": None, "test_accuracy": None}
     with open(meta_path) as f:
@@ -870,18 +1091,121 @@ def admin_model_info(current_admin: User = Depends(get_current_admin)):
     }
 
 
+@app.get("/api/admin/model/versions")
+def admin_model_versions(current_admin: User = Depends(get_current_admin)):
+    """Stored model versions, newest first, and which one is live, with Admin protection."""
+    try:
+        rollback_target = artifact_store.rollback_target()
+    except LookupError:
+        rollback_target = None
+    return {
+        "current": artifact_store.current_version(),
+        "rollback_target": rollback_target,
+        "keep": artifact_store.keep,
+        "versions": artifact_store.versions(),
+    }
+
+
+@app.post("/api/admin/model/versions/{version}/promote")
+def admin_model_promote(version: str, current_admin: User = Depends(get_current_admin)):
+    """Make a stored model version live in every worker with Admin protection."""
+    try:
+        registry.promote(version)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"ok": True, "version": version}
+
+
+@app.post("/api/admin/model/rollback")
+def admin_model_rollback(current_admin: User = Depends(get_current_admin)):
+    """Make the previously live model version live again with Admin protection."""
+    try:
+        version = registry.rollback()
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except StaleRollbackError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"ok": True, "version": version}
+
+
 @app.post("/api/admin/model/retrain")
 def admin_model_retrain(
     n_samples: int = Query(2500, ge=500, le=10000),
+    shadow_mode: bool = Query(False, alias="shadow"),
+    history: bool = Query(False),
     current_admin: User = Depends(get_current_admin)
 ):
-    """Retrain model (regenerate synthetic data + train) with Admin protection."""
+    """
+    Retrain model (regenerate synthetic data + train) in a background job with Admin protection.
+    With ?shadow=true the new model becomes a shadow candidate instead of replacing the live one;
+    with ?history=true triaged patient rows are added to the synthetic corpus.
+    Returns immediately; poll GET /api/admin/jobs/{job_id} for progress and the summary.
+    """
+    job = jobs.submit(
+        "retrain", n_samples=n_samples, seed=42, save_dataset=not shadow_mode, shadow=shadow_mode, history=history
+    )
+    return _job_accepted(job)
+
+
+@app.post("/api/admin/model/refresh")
+def admin_model_refresh(
+    shadow_mode: bool = Query(False, alias="shadow"),
+    current_admin: User = Depends(get_current_admin)
+):
+    """
+    Incremental refresh in a background job with Admin protection: adds trees fitted on patient rows
+    admitted since the live model's history checkpoint (e.g. nightly), without reprocessing older rows.
+    """
+    job = jobs.submit("refresh", shadow=shadow_mode)
+    return _job_accepted(job)
+
+
+def _job_accepted(job) -> JSONResponse:
+    return JSONResponse(
+        status_code=202,
+        content={"ok": True, "job_id": job.id, "status": job.status, "status_url": f"/api/admin/jobs/{job.id}"},
+    )
+
+
+@app.get("/api/admin/jobs")
+def admin_list_jobs(current_admin: User = Depends(get_current_admin)):
+    """Recent background jobs, newest first, with Admin protection."""
+    return {"jobs": jobs.snapshots()}
+
+
+@app.get("/api/admin/jobs/{job_id}")
+def admin_get_job(job_id: str, current_admin: User = Depends(get_current_admin)):
+    """Background job status, progress, recent log lines and final summary with Admin protection."""
+    job = jobs.snapshot(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@app.get("/api/admin/model/shadow")
+def admin_shadow_metrics(current_admin: User = Depends(get_current_admin)):
+    """Shadow candidate vs live model: agreement rate, probability deltas, latency, drops with Admin protection."""
+    return shadow.metrics()
+
+
+@app.post("/api/admin/model/shadow/promote")
+def admin_shadow_promote(current_admin: User = Depends(get_current_admin)):
+    """Make the shadow candidate the production model with Admin protection."""
     try:
-        from ml.train_model import train
-        _, _, summary = train(n_samples=n_samples)
-        return {"ok": True, "summary": summary}
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        version = shadow.promote()
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"ok": True, "version": version}
+
+
+@app.delete("/api/admin/model/shadow")
+def admin_shadow_discard(current_admin: User = Depends(get_current_admin)):
+    """Stop shadowing the candidate model in every worker with Admin protection."""
+    try:
+        version = shadow.discard()
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    return {"ok": True, "version": version}
 
 
 @app.post("/api/patients/{patient_id}/discharge")
@@ -897,6 +1221,36 @@ async def discharge_patient(patient_id: str, db: AsyncSession = Depends(get_db))
     return {"message": "Patient discharged successfully"}
 
 
+@app.get("/api/admin/inference/metrics")
+def admin_inference_metrics(current_admin: User = Depends(get_current_admin)):
+    """Inference pool queue depth, micro-batching histograms and prediction cache hits with Admin protection."""
+    return {
+        "pool": inference_pool.metrics(),
+        "scheduler": inference_scheduler.metrics(),
+        "prediction_cache": prediction_cache.metrics(),
+    }
+
+
+@app.get("/api/admin/metrics/stages")
+def admin_stage_metrics(current_admin: User = Depends(get_current_admin)):
+    """Per-route admission stage latency histograms (also sent per request as Server-Timing) with Admin protection."""
+    return stage_metrics.snapshot()
+
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint (request, DB, inference and cache metrics); unauthenticated, like /health."""
+    return Response(content=render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@app.get("/ready")
+def ready():
+    """Readiness for load balancers: 200 once model warm-up has finished, 503 while warming or if it failed."""
+    if not readiness.ready:
+        return JSONResponse(status_code=503, content=readiness.status())
+    return readiness.status()
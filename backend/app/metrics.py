@@ -0,0 +1,136 @@
+"""In-process metric primitives (histograms, counters, gauges) and Prometheus text rendering."""
+
+import bisect
+import threading
+
+# Prometheus text exposition format served by GET /metrics
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_str(labels: dict) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    # Shortest round-trip form (as prometheus_client does), so le="0.1" matches the configured bound
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def sample(name: str, value: float, labels: dict | None = None) -> str:
+    """One exposition line: name{labels} value."""
+    return f"{name}{_label_str(labels or {})} {_number(value)}"
+
+
+def family(name: str, kind: str, help_text: str, lines: list[str]) -> list[str]:
+    """HELP/TYPE header followed by the family's sample lines."""
+    return [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", *lines]
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is thread-safe and O(log buckets)."""
+
+    def __init__(self, buckets: list[float]):
+        self.buckets = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        """count, sum, mean and cumulative bucket counts keyed by upper bound ("le")."""
+        with self._lock:
+            counts, total, n = list(self._counts), self._sum, self._count
+        cumulative, running = {}, 0
+        for bound, c in zip(self.buckets + [float("inf")], counts):
+            running += c
+            cumulative["+Inf" if bound == float("inf") else f"{bound:g}"] = running
+        return {
+            "count": n,
+            "sum": round(total, 6),
+            "mean": round(total / n, 6) if n else 0.0,
+            "buckets": cumulative,
+        }
+
+    def prometheus(self, name: str, labels: dict | None = None) -> list[str]:
+        """name_bucket{le=...} (cumulative), name_sum and name_count lines."""
+        labels = labels or {}
+        with self._lock:
+            counts, total, n = list(self._counts), self._sum, self._count
+        lines, running = [], 0
+        for bound, c in zip(self.buckets + [float("inf")], counts):
+            running += c
+            lines.append(sample(f"{name}_bucket", running, {**labels, "le": _number(float(bound))}))
+        lines.append(sample(f"{name}_sum", total, labels))
+        lines.append(sample(f"{name}_count", n, labels))
+        return lines
+
+
+class LabeledHistogram:
+    """One Histogram per combination of label values, created on first observe()."""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...], buckets: list[float]):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._children: dict[tuple, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values) -> Histogram:
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, Histogram(self.buckets))
+        return child
+
+    def observe(self, value: float, *labelvalues) -> None:
+        self.labels(*labelvalues).observe(value)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            children = sorted(self._children.items())
+        lines = []
+        for values, histogram in children:
+            lines.extend(histogram.prometheus(self.name, dict(zip(self.labelnames, values))))
+        return family(self.name, "histogram", self.help_text, lines)
+
+
+class Counter:
+    """Monotonic counters keyed by label values (a Gauge when `kind="gauge"`, which may also go down)."""
+
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = (), kind: str = "counter"):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.kind = kind
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues) -> float:
+        with self._lock:
+            return self._values.get(labelvalues, 0)
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [sample(self.name, v, dict(zip(self.labelnames, k))) for k, v in values]
+        return family(self.name, self.kind, self.help_text, lines)
@@ -0,0 +1,159 @@
+"""Prometheus metrics for GET /metrics: HTTP requests, DB queries per request, inference and caches."""
+
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from app.inference_pool import inference_pool
+from app.inference_scheduler import inference_scheduler
+from app.metrics import Counter, LabeledHistogram, family, sample
+from app.stage_timing import stage_metrics
+from ml.prediction_cache import prediction_cache
+
+_LATENCY_BUCKETS_S = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+_QUERY_BUCKETS_S = [0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1]
+
+http_requests = Counter("http_requests_total", "HTTP requests by method, route template and status.", ("method", "route", "status"))
+http_latency = LabeledHistogram(
+    "http_request_duration_seconds", "HTTP request latency until the response body is sent.",
+    ("method", "route", "status"), _LATENCY_BUCKETS_S,
+)
+http_in_flight = Counter("http_requests_in_flight", "HTTP requests currently being served.", kind="gauge")
+db_queries = Counter("db_queries_total", "SQL statements executed, by the route that issued them.", ("route",))
+db_query_latency = LabeledHistogram(
+    "db_query_duration_seconds", "Duration of each SQL statement, by route.", ("route",), _QUERY_BUCKETS_S,
+)
+db_queries_per_request = LabeledHistogram(
+    "db_queries_per_request", "SQL statements executed per HTTP request.", ("route",), [0, 1, 2, 3, 5, 10, 25, 50, 100],
+)
+db_time_per_request = LabeledHistogram(
+    "db_time_per_request_seconds", "Total SQL time per HTTP request.", ("route",), _LATENCY_BUCKETS_S,
+)
+
+
+class _Request:
+    __slots__ = ("scope", "db_queries", "db_seconds")
+
+    def __init__(self, scope):
+        self.scope = scope  # The router adds "route" to it once matched
+        self.db_queries = 0
+        self.db_seconds = 0.0
+
+
+_current: ContextVar[_Request | None] = ContextVar("prometheus_request", default=None)
+
+
+def route_label(scope) -> str:
+    """Route template ("/api/patients/{patient_id}"), never the raw path, so label cardinality stays bounded."""
+    route = scope.get("route")
+    return getattr(route, "path", "unmatched")
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement on an (async) engine and attribute it to the current request, if any."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        request = _current.get()
+        route = "background" if request is None else route_label(request.scope)
+        db_queries.inc(route)
+        db_query_latency.observe(elapsed, route)
+        if request is not None:
+            request.db_queries += 1
+            request.db_seconds += elapsed
+
+
+class PrometheusMiddleware:
+    """
+    Pure ASGI middleware: counts and times every HTTP request by route template and status,
+    tracks in-flight requests and the SQL issued while serving each one.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        request = _Request(scope)
+        token = _current.set(request)
+        status = 500  # Reported if the app raises before sending a response
+        started = time.perf_counter()
+        http_in_flight.inc()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+            http_in_flight.inc(amount=-1)
+            method, route = scope["method"], route_label(scope)
+            http_requests.inc(method, route, str(status))
+            http_latency.observe(elapsed, method, route, str(status))
+            db_queries_per_request.observe(request.db_queries, route)
+            db_time_per_request.observe(request.db_seconds, route)
+
+
+def _inference_lines() -> list[str]:
+    pool = inference_pool.metrics()
+    cache = prediction_cache.metrics()
+    lines = [
+        *family("inference_pool_pending", "gauge", "Inference calls admitted (running + queued).",
+                [sample("inference_pool_pending", pool["pending"])]),
+        *family("inference_pool_running", "gauge", "Inference calls running on pool threads.",
+                [sample("inference_pool_running", pool["running"])]),
+        *family("inference_pool_completed_total", "counter", "Inference calls completed.",
+                [sample("inference_pool_completed_total", pool["completed"])]),
+        *family("inference_pool_rejected_total", "counter", "Inference calls rejected because the queue was full.",
+                [sample("inference_pool_rejected_total", pool["rejected"])]),
+        *inference_pool.call_seconds.render(),
+        *family("inference_batch_size", "histogram", "Patients per micro-batch scored by the scheduler.",
+                inference_scheduler.batch_size.prometheus("inference_batch_size")),
+        *family("inference_batch_wait_milliseconds", "histogram", "Time an admission waited for its micro-batch.",
+                inference_scheduler.wait_ms.prometheus("inference_batch_wait_milliseconds")),
+    ]
+    for kind in ("hits", "misses", "shap_hits", "shap_misses", "evictions"):
+        name = f"prediction_cache_{kind}_total"
+        lines += family(name, "counter", f"Prediction cache {kind.replace('_', ' ')}.", [sample(name, cache[kind])])
+    lines += family("prediction_cache_entries", "gauge", "Rows held in the prediction cache.",
+                    [sample("prediction_cache_entries", cache["size"])])
+    return lines
+
+
+def _stage_lines() -> list[str]:
+    name = "admission_stage_duration_milliseconds"
+    lines = []
+    for route, stages in stage_metrics.histograms().items():
+        for stage_name, histogram in stages.items():
+            lines += histogram.prometheus(name, {"route": route, "stage": stage_name})
+    return family(name, "histogram", "Admission pipeline stage durations (see Server-Timing).", lines)
+
+
+def render() -> str:
+    """Full Prometheus text exposition for the process."""
+    lines = [
+        *http_requests.render(),
+        *http_latency.render(),
+        *http_in_flight.render(),
+        *db_queries.render(),
+        *db_query_latency.render(),
+        *db_queries_per_request.render(),
+        *db_time_per_request.render(),
+        *_inference_lines(),
+        *_stage_lines(),
+    ]
+    return "\n".join(lines) + "\n"
@@ -135,6 +135,15 @@ class PatientResponse(BaseModel):
     is_active: bool = True
 
 
+class PatientBatchCreate(BaseModel):
+    patients: list[PatientCreate] = Field(..., min_length=1, max_length=200)
+
+
+class PatientBatchResponse(BaseModel):
+    patients: list[PatientResponse]
+    total: int
+
+
 class PatientRegister(BaseModel):
     full_name: str
     email: str
@@ -0,0 +1,255 @@
+"""Shadow evaluation: a candidate model scores live admissions off the critical path, compared with production."""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from app.metrics import Histogram
+from ml.preprocessing import patients_to_columns, raw_feature_matrix
+from ml.artifact_store import ArtifactStore, artifact_store
+from ml.registry import MODEL_POINTER_CHECK_SECONDS, ModelBundle, load_bundle, registry
+
+# Queued shadow batches before new ones are dropped; shadow work never waits or blocks admissions
+SHADOW_MAX_PENDING = int(os.getenv("SHADOW_MAX_PENDING", "16"))
+_LATENCY_BUCKETS_MS = [0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+
+
+class ShadowStats:
+    """Agreement and probability deltas (candidate - live) for one candidate version."""
+
+    def __init__(self, classes: list[str]):
+        self.classes = classes
+        self.scored = 0
+        self.agreements = 0
+        self.transitions: dict[str, int] = {}  # "live->candidate" risk level pairs
+        self.delta_sum = np.zeros(len(classes))
+        self.abs_delta_sum = np.zeros(len(classes))
+        self.max_abs_delta = np.zeros(len(classes))
+        self.latency_ms = {"live": Histogram(_LATENCY_BUCKETS_MS), "candidate": Histogram(_LATENCY_BUCKETS_MS)}
+
+    def record(self, live: np.ndarray, candidate: np.ndarray) -> None:
+        delta = candidate - live
+        self.scored += len(live)
+        for a, b in zip(np.argmax(live, axis=1), np.argmax(candidate, axis=1)):
+            self.agreements += int(a == b)
+            key = f"{self.classes[a]}->{self.classes[b]}"
+            self.transitions[key] = self.transitions.get(key, 0) + 1
+        self.delta_sum += delta.sum(axis=0)
+        self.abs_delta_sum += np.abs(delta).sum(axis=0)
+        self.max_abs_delta = np.maximum(self.max_abs_delta, np.abs(delta).max(axis=0))
+
+    def snapshot(self) -> dict:
+        n = self.scored
+        return {
+            "scored": n,
+            "agreement_rate": round(self.agreements / n, 4) if n else None,
+            "transitions": dict(sorted(self.transitions.items())),
+            "probability_delta": {
+                c: {
+                    "mean": round(float(self.delta_sum[i]) / n, 6) if n else None,
+                    "mean_abs": round(float(self.abs_delta_sum[i]) / n, 6) if n else None,
+                    "max_abs": round(float(self.max_abs_delta[i]), 6),
+                }
+                for i, c in enumerate(self.classes)
+            },
+            "latency_ms_per_patient": {name: h.snapshot() for name, h in self.latency_ms.items()},
+        }
+
+
+class ShadowEvaluator:
+    """
+    Holds an optional candidate bundle next to the live one. submit() is called on the event loop
+    after an admission has been scored and returns immediately: scoring runs on one dedicated
+    thread (not the inference pool), and once `max_pending` batches are queued new ones are
+    dropped and counted instead of queuing behind live traffic.
+
+    The candidate is a version in the artifact store named by its candidate.json pointer, so every
+    uvicorn worker shadows the same one: like ModelRegistry, submit() and metrics() stat the
+    pointer at most every check_interval seconds and a background thread follows a change.
+    Comparison stats are kept per worker.
+    """
+
+    def __init__(
+        self,
+        store: ArtifactStore = artifact_store,
+        max_pending: int = SHADOW_MAX_PENDING,
+        check_interval: float = MODEL_POINTER_CHECK_SECONDS,
+    ):
+        self.store = store
+        self.max_pending = max_pending
+        self.check_interval = check_interval
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="shadow")
+        self._lock = threading.Lock()
+        self._candidate: ModelBundle | None = None
+        self._stats: ShadowStats | None = None
+        self._stamp: tuple | None = None  # candidate.json stamp the loaded candidate was resolved from
+        self._next_check = 0.0
+        self._following = False
+        self._pending = 0
+        self._dropped = 0
+        self._errors = 0
+
+    @property
+    def candidate(self) -> ModelBundle | None:
+        return self._candidate
+
+    def _install(self, bundle: ModelBundle | None, stamp: tuple | None) -> None:
+        with self._lock:
+            if bundle is None or self._candidate is None or bundle.version != self._candidate.version:
+                self._candidate = bundle
+                self._stats = ShadowStats(bundle.classes) if bundle is not None else None
+                self._dropped = self._errors = 0
+            self._stamp = stamp
+
+    def _resolve(self) -> ModelBundle | None:
+        """Load the version candidate.json names (None if no candidate is registered) and shadow it here."""
+        stamp = self.store.candidate_stamp()  # Before resolving, so a concurrent change is seen next check
+        version = self.store.candidate_version()
+        bundle = None
+        if version is not None:
+            current = self._candidate
+            bundle = current if current is not None and current.version == version else self._prepare(version)
+        self._install(bundle, stamp)
+        return bundle
+
+    def _prepare(self, version: str) -> ModelBundle:
+        bundle = load_bundle(self.store.version_dir(version))
+        bundle.forest()
+        return bundle
+
+    def _check_pointer(self) -> None:
+        if self.check_interval <= 0 or time.monotonic() < self._next_check:
+            return
+        self._next_check = time.monotonic() + self.check_interval
+        stamp = self.store.candidate_stamp()
+        with self._lock:
+            if stamp == self._stamp or self._following:
+                return
+            self._following = True
+        threading.Thread(target=self._follow, args=(stamp,), name="shadow-pointer", daemon=True).start()
+
+    def _follow(self, stamp: tuple | None) -> None:
+        try:
+            bundle = self._resolve()
+            print(f"Shadow candidate pointer changed; now shadowing {bundle.version if bundle else 'nothing'}")
+        except Exception as e:
+            self._stamp = stamp  # Retried on the next pointer change, not on every admission
+            print(f"Shadow candidate pointer changed but the candidate was not loaded: {e!r}")
+        finally:
+            self._following = False
+
+    def restore(self) -> None:
+        """Load the candidate registered in the artifact store, if any (at startup)."""
+        try:
+            self._resolve()
+        except Exception as e:
+            print(f"Shadow candidate {self.store.candidate_version()} not loaded: {e!r}")
+        self._next_check = time.monotonic() + self.check_interval
+
+    def stage(self, version: str) -> ModelBundle:
+        """
+        Make a stored version the shadow candidate for every worker. It is loaded here before the
+        pointer changes, so this worker starts comparing at once; the others follow the pointer.
+        """
+        bundle = self._prepare(version)
+        with self._lock:
+            self._following = True  # Our own pointer change is not a change to follow
+        try:
+            self.store.set_candidate(version)
+            self._install(bundle, self.store.candidate_stamp())
+        finally:
+            self._following = False
+        return bundle
+
+    def submit(self, patients: list[dict], live_probabilities: list[np.ndarray], live_bundle: ModelBundle) -> bool:
+        """Queue patients (predict_risk keyword arguments) for shadow scoring; False if skipped or dropped."""
+        self._check_pointer()
+        if self._candidate is None or not patients:
+            return False
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._dropped += len(patients)
+                return False
+            self._pending += 1
+        self._executor.submit(self._score, self._candidate, live_bundle, patients, live_probabilities)
+        return True
+
+    def _score(self, candidate: ModelBundle, live_bundle: ModelBundle, patients, live_probabilities) -> None:
+        try:
+            raw = raw_feature_matrix(patients_to_columns(patients))
+            # Both models timed here, on the same thread and inputs, so the latencies are comparable
+            t0 = time.perf_counter()
+            live_bundle.forest().predict_proba(raw)
+            live_ms = 1000 * (time.perf_counter() - t0) / len(raw)
+            t0 = time.perf_counter()
+            probs = candidate.forest().predict_proba(raw)
+            candidate_ms = 1000 * (time.perf_counter() - t0) / len(raw)
+            # Compare against what the admission actually returned, with columns in live class order
+            probs = probs[:, [candidate.classes.index(c) for c in live_bundle.classes]]
+            with self._lock:
+                if candidate is not self._candidate:
+                    return  # Candidate was replaced or discarded while this batch was queued
+                self._stats.record(np.vstack(live_probabilities), probs)
+                self._stats.latency_ms["live"].observe(live_ms)
+                self._stats.latency_ms["candidate"].observe(candidate_ms)
+        except Exception as e:
+            with self._lock:
+                self._errors += 1
+            print(f"Shadow scoring failed: {e!r}")
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def promote(self) -> str:
+        """Make the registered candidate the live version (every worker follows); raises LookupError if none."""
+        version = self.store.candidate_version()
+        if version is None:
+            raise LookupError("No shadow candidate registered")
+        registry.promote(version)
+        # Only unregister what was promoted: a candidate staged meanwhile keeps being shadowed
+        self._clear(version)
+        return version
+
+    def discard(self) -> str:
+        """Stop shadowing in every worker; returns the discarded version, raises LookupError if none."""
+        version = self._clear()
+        if version is None:
+            raise LookupError("No shadow candidate registered")
+        return version
+
+    def _clear(self, version: str | None = None) -> str | None:
+        with self._lock:
+            self._following = True
+        try:
+            cleared = self.store.clear_candidate(version)
+            if cleared is not None:
+                self._install(None, self.store.candidate_stamp())
+        finally:
+            self._following = False
+        return cleared
+
+    def metrics(self) -> dict:
+        self._check_pointer()
+        with self._lock:
+            candidate, stats = self._candidate, self._stats
+            out = {
+                "candidate_version": self.store.candidate_version(),
+                "loaded_candidate_version": candidate.version if candidate else None,
+                "live_version": registry.current().version if registry.loaded else None,
+                "max_pending": self.max_pending,
+                "pending": self._pending,
+                "dropped": self._dropped,
+                "errors": self._errors,
+            }
+            if stats is not None:
+                out.update(stats.snapshot())
+        return out
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+shadow = ShadowEvaluator()
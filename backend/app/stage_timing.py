@@ -0,0 +1,132 @@
+"""Per-request stage timing: `with stage("predict"):` blocks, Server-Timing header and per-route histograms."""
+
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from app.metrics import Histogram
+
+# With STAGE_TIMING=0 the middleware is not installed and stage() returns a shared no-op
+STAGE_TIMING_ENABLED = os.getenv("STAGE_TIMING", "1") == "1"
+_STAGE_BUCKETS_MS = [0.1, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500]
+
+_current: ContextVar["StageTimer | None"] = ContextVar("stage_timer", default=None)
+
+
+class StageTimer:
+    """Stage durations (ms) for one request, in first-seen order; repeated stages accumulate."""
+
+    __slots__ = ("stages",)
+
+    def __init__(self):
+        self.stages: dict[str, float] = {}
+
+    def add(self, name: str, ms: float) -> None:
+        self.stages[name] = self.stages.get(name, 0.0) + ms
+
+
+class _Stage:
+    __slots__ = ("timer", "name", "started")
+
+    def __init__(self, timer: StageTimer, name: str):
+        self.timer = timer
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.timer.add(self.name, 1000 * (time.perf_counter() - self.started))
+        return False
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+def stage(name: str):
+    """Context manager timing one stage of the current request (no-op outside an instrumented request)."""
+    timer = _current.get()
+    if timer is None:
+        return _NO_STAGE
+    return _Stage(timer, name)
+
+
+class StageMetrics:
+    """Histograms per (route, stage), including each route's "total"."""
+
+    def __init__(self):
+        self._histograms: dict[tuple[str, str], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, route: str, name: str, ms: float) -> None:
+        histogram = self._histograms.get((route, name))
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault((route, name), Histogram(_STAGE_BUCKETS_MS))
+        histogram.observe(ms)
+
+    def histograms(self) -> dict[str, dict[str, Histogram]]:
+        """{route: {stage: Histogram}}, sorted."""
+        with self._lock:
+            items = sorted(self._histograms.items())
+        out: dict[str, dict[str, Histogram]] = {}
+        for (route, name), histogram in items:
+            out.setdefault(route, {})[name] = histogram
+        return out
+
+    def snapshot(self) -> dict:
+        routes = {
+            route: {name: histogram.snapshot() for name, histogram in stages.items()}
+            for route, stages in self.histograms().items()
+        }
+        return {"enabled": STAGE_TIMING_ENABLED, "routes": routes}
+
+
+stage_metrics = StageMetrics()
+
+
+class StageTimingMiddleware:
+    """
+    Pure ASGI middleware: gives each HTTP request a StageTimer and, for requests that recorded
+    stages, adds a Server-Timing header (stages plus "total") and feeds stage_metrics.
+    """
+
+    def __init__(self, app, metrics: StageMetrics = stage_metrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timer = StageTimer()
+        token = _current.set(timer)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and timer.stages:
+                total = 1000 * (time.perf_counter() - started)
+                value = ", ".join(f"{name};dur={ms:.2f}" for name, ms in (*timer.stages.items(), ("total", total)))
+                message = {**message, "headers": [*message.get("headers", []), (b"server-timing", value.encode())]}
+                route = scope.get("route")
+                label = getattr(route, "path", scope["path"])
+                for name, ms in timer.stages.items():
+                    self.metrics.observe(label, name, ms)
+                self.metrics.observe(label, "total", total)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
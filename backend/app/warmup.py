@@ -0,0 +1,45 @@
+"""Startup warm-up and readiness: a worker reports ready only once the model path is hot."""
+
+import time
+
+from app.inference_pool import InferencePool, inference_pool
+from ml.inference import warm_up
+
+
+class Readiness:
+    """Warm-up outcome for /ready. Only touched from the event loop thread."""
+
+    def __init__(self):
+        self.ready = False
+        self.error: str | None = None
+        self.started_at: float | None = None
+        self.duration_ms: float | None = None
+        self.steps: dict = {}
+
+    async def warm(self, pool: InferencePool = inference_pool) -> None:
+        """Run ml.inference.warm_up on the inference pool so the event loop keeps serving /health."""
+        self.started_at = time.perf_counter()
+        try:
+            self.steps = await pool.run(warm_up)
+            self.ready = True
+        except FileNotFoundError:
+            self.error = "ML model not found. Run: python -m ml.train_model from backend directory."
+            print(self.error)
+        except Exception as e:
+            self.error = f"Warm-up failed: {e!r}"
+            print(self.error)
+        self.duration_ms = round(1000 * (time.perf_counter() - self.started_at), 1)
+        if self.ready:
+            print(f"Model warm-up finished in {self.duration_ms} ms: {self.steps}")
+
+    def status(self) -> dict:
+        if self.ready:
+            state = "ready"
+        elif self.error:
+            state = "failed"
+        else:
+            state = "warming"
+        return {"status": state, "error": self.error, "warmup_ms": self.duration_ms, "steps": self.steps}
+
+
+readiness = Readiness()
@@ -0,0 +1,212 @@
+"""Latency percentiles and throughput for the admission hot path: model calls and POST /api/patients."""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import tempfile
+import time
+import warnings
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+
+MODEL_FIELDS = (
+    "age", "gender", "heart_rate", "blood_pressure_systolic", "blood_pressure_diastolic", "temperature",
+    "spo2", "chronic_disease_count", "respiratory_rate", "pain_score", "symptom_duration", "symptoms",
+)
+
+
+def summarize(samples: list[float], wall_s: float) -> dict:
+    """Nearest-rank percentiles in milliseconds and calls per second over the wall-clock time."""
+    ms = sorted(1000 * s for s in samples)
+
+    def pct(q: float) -> float:
+        return round(ms[max(0, math.ceil(q * len(ms)) - 1)], 3)
+
+    return {
+        "n": len(ms),
+        "p50_ms": pct(0.50),
+        "p95_ms": pct(0.95),
+        "p99_ms": pct(0.99),
+        "mean_ms": round(sum(ms) / len(ms), 3),
+        "max_ms": round(ms[-1], 3),
+        "throughput_per_s": round(len(ms) / wall_s, 1),
+    }
+
+
+def time_calls(calls: list, warmup: int) -> dict:
+    for call in calls[:warmup]:
+        call()
+    samples = []
+    started = time.perf_counter()
+    for call in calls:
+        t0 = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - t0)
+    return summarize(samples, time.perf_counter() - started)
+
+
+def dataset_patients(n: int) -> list[dict]:
+    """Intake payloads rebuilt from data/triage_dataset.csv (symptom_* one-hot columns back to a list)."""
+    import pandas as pd
+
+    from ml.preprocessing import SYMPTOM_COLUMNS
+    from ml.train_model import DATASET_PATH
+
+    df = pd.read_csv(DATASET_PATH).head(n)
+    patients = []
+    for row in df.to_dict(orient="records"):
+        patient = {k: row[k] for k in MODEL_FIELDS if k != "symptoms"}
+        patient["symptoms"] = [c[len("symptom_"):] for c in SYMPTOM_COLUMNS if row.get(c)]
+        patients.append(patient)
+    return patients
+
+
+def admissible(patient: dict) -> dict:
+    """
+    Nudge a synthetic row into what intake validation accepts (at least one symptom, duration of
+    an hour or more, diastolic below systolic, temperature to one decimal like the intake form).
+    """
+    return {
+        **patient,
+        "symptoms": patient["symptoms"] or ["other"],
+        "symptom_duration": max(1, int(patient["symptom_duration"])),
+        "blood_pressure_diastolic": min(int(patient["blood_pressure_diastolic"]), int(patient["blood_pressure_systolic"]) - 1),
+        "temperature": round(float(patient["temperature"]), 1),
+    }
+
+
+def simulated_patients(n: int, seed: int) -> list[dict]:
+    from app.simulation import generate_random_patient
+
+    random.seed(seed)
+    return [generate_random_patient(force_high_risk=i % 5 == 0) for i in range(n)]
+
+
+def bench_model_calls(patients: list[dict], warmup: int) -> dict:
+    import joblib
+
+    from ml.inference import get_explainability, predict_risk
+    from ml.preprocessing import preprocess_single
+    from ml.registry import get_bundle
+
+    bundle = get_bundle()
+    # The serving bundle may not carry a scaler (folded into the compiled forest); preprocess_single needs one
+    scaler = bundle.scaler or joblib.load(bundle.model_path.parent / "scaler.joblib")
+    kwargs = [{k: p[k] for k in MODEL_FIELDS} for p in patients]
+    preds = [predict_risk(**kw) for kw in kwargs]  # Untimed: inputs for get_explainability
+    return {
+        "preprocess_single": time_calls([partial(preprocess_single, **kw, scaler=scaler) for kw in kwargs], warmup),
+        "predict_risk": time_calls([partial(predict_risk, **kw) for kw in kwargs], warmup),
+        "get_explainability": time_calls([
+            partial(
+                get_explainability, **kw, risk_level=pred["risk_level"],
+                recommended_department="General Medicine", inference=pred["inference"],
+            )
+            for kw, pred in zip(kwargs, preds)
+        ], warmup),
+    }
+
+
+async def bench_admissions(sources: dict[str, list[dict]], warmup: int, concurrency: int) -> dict:
+    """
+    POST /api/patients through an in-process ASGI client, per input source: one request at a time,
+    then `concurrency` in flight. All sources share one app lifespan (and one event loop).
+    """
+    from httpx import ASGITransport, AsyncClient
+    from pydantic import ValidationError
+
+    from app.main import app
+    from app.schemas import PatientCreate
+
+    async def post(client, payload, headers) -> tuple[float, bool]:
+        t0 = time.perf_counter()
+        res = await client.post("/api/patients", json=payload, headers=headers)
+        return time.perf_counter() - t0, res.status_code == 200
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://benchmark") as client:
+            # Admissions require a signed-in user; register one in the temporary DB
+            user = {"username": "benchmark", "email": "benchmark@example.com", "password": "benchmark", "role": "admin"}
+            await client.post("/api/auth/register", json={**user, "full_name": "Benchmark"})
+            res = await client.post("/api/auth/login", data={"username": user["username"], "password": user["password"]})
+            headers = {"Authorization": f"Bearer {res.json()['access_token']}"}
+
+            for name, patients in sources.items():
+                payloads = []
+                for p in patients:
+                    try:
+                        payloads.append(PatientCreate.model_validate(admissible(p)).model_dump(mode="json"))
+                    except ValidationError:
+                        pass  # Still outside intake validation after admissible(); the API would reject it
+                for payload in payloads[:warmup]:
+                    await post(client, payload, headers)
+
+                started = time.perf_counter()
+                sequential = [await post(client, payload, headers) for payload in payloads]
+                sequential_wall = time.perf_counter() - started
+
+                gate = asyncio.Semaphore(concurrency)
+
+                async def limited(payload) -> tuple[float, bool]:
+                    async with gate:
+                        return await post(client, payload, headers)
+
+                started = time.perf_counter()
+                concurrent = await asyncio.gather(*(limited(payload) for payload in payloads))
+                concurrent_wall = time.perf_counter() - started
+                results[name] = {
+                    "admissible": len(payloads),
+                    "skipped_invalid": len(patients) - len(payloads),
+                    "errors": sum(not ok for _, ok in sequential + list(concurrent)),
+                    "sequential": summarize([t for t, _ in sequential], sequential_wall),
+                    f"concurrency_{concurrency}": summarize([t for t, _ in concurrent], concurrent_wall),
+                }
+    return results
+
+
+def run(n: int = 300, warmup: int = 20, concurrency: int = 16, seed: int = 42, use_cache: bool = False) -> dict:
+    # Must be set before app/ml modules are imported: they read these at import time
+    db_dir = tempfile.mkdtemp(prefix="triage-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{Path(db_dir) / 'bench.db'}"
+    os.environ.pop("OPENAI_API_KEY", None)  # Measure our code, not the LLM round trip
+    if not use_cache:
+        os.environ["PREDICTION_CACHE_SIZE"] = "0"
+
+    from ml.registry import get_bundle
+
+    # preprocess_single hands the scaler a bare array; sklearn warns on every call
+    warnings.filterwarnings("ignore", message="X does not have valid feature names")
+    sources = {"dataset": dataset_patients(n), "simulated": simulated_patients(n, seed)}
+    results = {name: {"model": bench_model_calls(patients, warmup)} for name, patients in sources.items()}
+    for name, admissions in asyncio.run(bench_admissions(sources, warmup, concurrency)).items():
+        results[name]["post_api_patients"] = admissions
+    return {
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "model_version": get_bundle().version,
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "config": {"n": n, "warmup": warmup, "concurrency": concurrency, "seed": seed, "prediction_cache": use_cache},
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=300, help="Patients per input source")
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--with-cache", action="store_true", help="Leave the prediction cache enabled")
+    parser.add_argument("--output", type=Path, help="Write the JSON report here instead of stdout")
+    args = parser.parse_args()
+    report = json.dumps(run(args.n, args.warmup, args.concurrency, args.seed, args.with_cache), indent=2)
+    if args.output:
+        args.output.write_text(report + "\n")
+    else:
+        print(report)
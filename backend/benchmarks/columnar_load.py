@@ -0,0 +1,68 @@
+"""Training dataset load time: columnar .npy (memory-mapped) vs CSV, into the build_features matrix."""
+
+import argparse
+import json
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from ml.columnar_dataset import load_feature_matrix, load_frame, read_summary, write_columnar
+from ml.synthetic_shards import iter_synthetic_chunks
+from ml.train_model import build_features
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - t0
+
+
+def run(rows: int = 10_000_000, csv_rows: int = 1_000_000, chunk_rows: int = 250_000, seed: int = 42) -> dict:
+    work = Path(tempfile.mkdtemp(prefix="triage-columnar-"))
+    try:
+        summary, write_s = _timed(lambda: write_columnar(iter_synthetic_chunks(rows, chunk_rows, seed), work / "columnar"))
+        (X, y), load_s = _timed(lambda: load_feature_matrix(work / "columnar"))
+        _, summary_s = _timed(lambda: read_summary(work / "columnar"))
+        disk_mb = sum(p.stat().st_size for p in (work / "columnar").iterdir()) / 2**20
+
+        # CSV baseline on fewer rows (parsing 10M rows of CSV takes minutes); per-row cost scales linearly
+        csv_path = work / "dataset.csv"
+        load_frame(work / "columnar").head(csv_rows).to_csv(csv_path, index=False)
+        X_csv, csv_s = _timed(lambda: build_features(pd.read_csv(csv_path)).to_numpy())
+        csv_columnar, csv_columnar_s = _timed(lambda: load_feature_matrix(work / "columnar", rows=slice(0, csv_rows)))
+        return {
+            "rows": summary["rows"],
+            "columnar": {
+                "write_seconds": round(write_s, 3),
+                "load_seconds": round(load_s, 3),
+                "rows_per_s": round(summary["rows"] / load_s),
+                "summary_read_ms": round(1000 * summary_s, 3),
+                "disk_mb": round(disk_mb, 1),
+                "matrix_mb": round(X.nbytes / 2**20, 1),
+            },
+            "csv": {
+                "rows": len(X_csv),
+                "load_seconds": round(csv_s, 3),
+                "columnar_load_seconds_same_rows": round(csv_columnar_s, 3),
+                "disk_mb": round(csv_path.stat().st_size / 2**20, 1),
+                "projected_load_seconds_all_rows": round(csv_s * summary["rows"] / len(X_csv), 1),
+                # The CSV holds the same rows, so both loaders must build the same matrix
+                "matches_columnar": bool(np.array_equal(X_csv.astype(np.float32), csv_columnar[0])),
+            },
+        }
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--csv-rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-rows", type=int, default=250_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.csv_rows, args.chunk_rows, args.seed), indent=2))
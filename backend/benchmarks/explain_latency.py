@@ -0,0 +1,62 @@
+"""Per-patient SHAP explanation cost: explainer rebuilt per request vs cached vs batched."""
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+from ml.inference import shap_contributions_batch
+from ml.preprocessing import raw_feature_matrix
+from ml.registry import get_bundle
+from ml.train_model import DATASET_PATH
+
+
+def _per_row_ms(fn, n_rows: int, repeats: int) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return 1000 * best / n_rows
+
+
+def run(n_rows: int = 200, repeats: int = 3) -> dict:
+    import shap
+
+    bundle = get_bundle()
+    df = pd.read_csv(DATASET_PATH).head(n_rows)
+    X = bundle.scale(raw_feature_matrix(df))
+    classes = np.argmax(bundle.estimator().predict_proba(X), axis=1)
+    bundle.explainer()  # Build outside the timed region, as warm-up does in serving
+
+    def rebuilt_per_request():
+        # Previous behaviour: a new TreeExplainer for every admission
+        for i in range(len(X)):
+            shap.TreeExplainer(bundle.estimator(), feature_perturbation="interventional").shap_values(X[i:i + 1])
+
+    def cached_per_request():
+        for i in range(len(X)):
+            shap_contributions_batch(bundle, X[i:i + 1], classes[i:i + 1])
+
+    def cached_batched():
+        shap_contributions_batch(bundle, X, classes)
+
+    return {
+        "rows": len(X),
+        "model_version": bundle.version,
+        "ms_per_patient": {
+            "explainer_per_request": round(_per_row_ms(rebuilt_per_request, len(X), repeats), 3),
+            "cached_explainer": round(_per_row_ms(cached_per_request, len(X), repeats), 3),
+            "cached_explainer_batched": round(_per_row_ms(cached_batched, len(X), repeats), 3),
+        },
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    print(json.dumps(run(args.rows, args.repeats), indent=2))
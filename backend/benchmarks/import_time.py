@@ -0,0 +1,52 @@
+"""Import-time budget for the API process: parses `python -X importtime` and fails over the threshold."""
+
+import argparse
+import json
+import subprocess
+import sys
+
+# Optional subsystems that must load on first use, never while the app module is imported
+DEFERRED_MODULES = ("shap", "pandas", "sklearn", "scipy", "numba", "openai", "pypdf", "matplotlib")
+DEFAULT_BUDGET_MS = 1500.0
+
+
+def import_times(module: str) -> dict[str, dict]:
+    """{module: {"self_ms", "cumulative_ms"}} for one fresh `import module` in a subprocess."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times[name.strip()] = {"self_ms": int(self_us) / 1000, "cumulative_ms": int(cumulative_us) / 1000}
+    return times
+
+
+def check(module: str = "app.main", budget_ms: float = DEFAULT_BUDGET_MS, top: int = 15) -> dict:
+    times = import_times(module)
+    total_ms = times[module]["cumulative_ms"]
+    loaded_early = sorted(name for name in DEFERRED_MODULES if name in times)
+    slowest = sorted(times.items(), key=lambda kv: kv[1]["self_ms"], reverse=True)[:top]
+    return {
+        "module": module,
+        "total_ms": round(total_ms, 1),
+        "budget_ms": budget_ms,
+        "within_budget": total_ms <= budget_ms,
+        "deferred_modules_imported": loaded_early,
+        "slowest_self_ms": {name: round(t["self_ms"], 1) for name, t in slowest},
+        "ok": total_ms <= budget_ms and not loaded_early,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3, help="Report the fastest of this many fresh imports")
+    args = parser.parse_args()
+    report = min((check(args.module, args.budget_ms) for _ in range(args.runs)), key=lambda r: r["total_ms"])
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["ok"] else 1)
@@ -0,0 +1,135 @@
+"""SQLite query plans and timings for the hot PatientRecord queries on a large table, without and with its indexes."""
+
+import argparse
+import contextlib
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import create_engine, event, select
+
+from app.database import Base, PatientRecord, _sync_indexes
+
+RISK_SHARES = {"low": 0.6, "medium": 0.3, "high": 0.1}
+ACTIVE_SHARE = 0.05  # Most records are discharged
+DAYS = 365
+
+
+def queries(now: datetime, user_id: int) -> dict:
+    """The statements app.main issues, by access path."""
+    today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    return {
+        # _todays_patients (add_patient)
+        "todays_patients": select(PatientRecord).filter(PatientRecord.created_at >= today_start),
+        # Queue position (patient dashboard)
+        "active_queue": select(PatientRecord)
+        .filter(PatientRecord.is_active == True)  # noqa: E712  Same expression as the endpoint
+        .order_by(PatientRecord.priority_score.desc(), PatientRecord.created_at.asc()),
+        # GET /api/admin/patients?risk= and GET /api/admin/export?risk=
+        "admin_list_by_risk": select(PatientRecord).filter(PatientRecord.risk_level == "high").limit(100),
+        "export_by_risk": select(PatientRecord).filter(PatientRecord.risk_level == "high"),
+        # Latest record for the logged-in patient (patient dashboard)
+        "patient_latest": select(PatientRecord)
+        .filter(PatientRecord.user_id == user_id)
+        .order_by(PatientRecord.created_at.desc()),
+    }
+
+
+def populate(conn, rows: int, now: datetime, seed: int, batch: int = 100_000) -> None:
+    rng = np.random.default_rng(seed)
+    start, span = now - timedelta(days=DAYS), DAYS * 86400
+    sql = (
+        "INSERT INTO patients (patient_id, age, gender, heart_rate, blood_pressure_systolic, blood_pressure_diastolic,"
+        " temperature, spo2, respiratory_rate, pain_score, chronic_disease_count, symptom_duration, risk_level,"
+        " priority_score, recommended_department, is_active, created_at, user_id)"
+        " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+    )
+    for offset in range(0, rows, batch):
+        n = min(batch, rows - offset)
+        # Admission times spread over the last year, increasing with id like a live table
+        seconds = np.sort(rng.uniform(span * offset / rows, span * (offset + n) / rows, n))
+        age = rng.integers(1, 100, n)
+        risk = rng.choice(list(RISK_SHARES), n, p=list(RISK_SHARES.values()))
+        active = rng.random(n) < ACTIVE_SHARE
+        user = rng.integers(1, max(rows // 5, 2), n)
+        conn.exec_driver_sql(sql, [
+            (
+                f"P-{offset + i:08d}", int(age[i]), "female", 80.0, 120.0, 80.0, 36.8, 97.0, 16.0, 3, 1, 24.0,
+                risk[i], float(rng.random() * 10), "General Medicine", bool(active[i]),
+                (start + timedelta(seconds=float(seconds[i]))).strftime("%Y-%m-%d %H:%M:%S.%f"), int(user[i]),
+            )
+            for i in range(n)
+        ])
+
+
+def measure(conn, statements: dict) -> dict:
+    """Run each statement once; EXPLAIN QUERY PLAN the exact SQL and parameters the driver received."""
+    captured = {}
+
+    def capture(conn_, cursor, statement, parameters, context, executemany):
+        captured["sql"], captured["params"] = statement, parameters
+
+    event.listen(conn, "before_cursor_execute", capture)
+    out = {}
+    try:
+        for name, stmt in statements.items():
+            t0 = time.perf_counter()
+            n_rows = len(conn.execute(stmt).fetchall())
+            elapsed = time.perf_counter() - t0
+            plan = [row[3] for row in conn.exec_driver_sql("EXPLAIN QUERY PLAN " + captured["sql"], captured["params"])]
+            out[name] = {
+                "ms": round(1000 * elapsed, 2),
+                "rows": n_rows,
+                "plan": plan,
+                # "SCAN patients [USING INDEX ...]" visits every row; a temp B-tree means a sort of the matches
+                "full_scan": any(step.startswith("SCAN patients") for step in plan),
+                "sorts": any("TEMP B-TREE" in step for step in plan),
+            }
+    finally:
+        event.remove(conn, "before_cursor_execute", capture)
+    return out
+
+
+def run(rows: int = 1_000_000, seed: int = 42) -> dict:
+    now = datetime.utcnow()
+    with tempfile.TemporaryDirectory(prefix="triage-plans-") as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'plans.db'}")
+        with engine.begin() as conn:
+            Base.metadata.create_all(conn)
+            for index in PatientRecord.__table_args__:
+                index.drop(conn)  # Baseline: only the id / patient_id indexes the table had before
+            t0 = time.perf_counter()
+            populate(conn, rows, now, seed)
+            insert_s = time.perf_counter() - t0
+        user_id = 7
+        with engine.connect() as conn:
+            without = measure(conn, queries(now, user_id))
+        t0 = time.perf_counter()
+        with engine.begin() as conn, contextlib.redirect_stdout(sys.stderr):
+            _sync_indexes(conn)  # What init_db does at startup on an existing database
+        index_s = time.perf_counter() - t0
+        with engine.connect() as conn:
+            with_indexes = measure(conn, queries(now, user_id))
+        engine.dispose()
+    return {
+        "rows": rows,
+        "insert_seconds": round(insert_s, 1),
+        "create_indexes_seconds": round(index_s, 1),
+        "without_indexes": without,
+        "with_indexes": with_indexes,
+        "ok": not any(q["full_scan"] or q["sorts"] for q in with_indexes.values()),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    report = run(args.rows, args.seed)
+    print(json.dumps(report, indent=2))
+    sys.exit(0 if report["ok"] else 1)
@@ -0,0 +1,55 @@
+"""Synthetic dataset generation time vs row count (generate_synthetic_data should scale linearly)."""
+
+import argparse
+import json
+import math
+import time
+import tracemalloc
+
+from ml.train_model import SYMPTOM_COLUMNS, generate_synthetic_data
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000, 1_000_000)
+
+
+def time_generation(n: int, repeats: int, seed: int) -> dict:
+    best = float("inf")
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        df = generate_synthetic_data(n, seed=seed)
+        best = min(best, time.perf_counter() - t0)
+    tracemalloc.start()
+    generate_synthetic_data(n, seed=seed)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "rows": len(df),
+        "seconds": round(best, 4),
+        "rows_per_s": round(len(df) / best),
+        "us_per_row": round(1e6 * best / len(df), 3),
+        "peak_mb": round(peak / 2**20, 1),
+        # Should match across sizes: ~60/30/10 resampling and per-class symptom counts
+        "class_share": {k: round(v, 3) for k, v in df["risk"].value_counts(normalize=True).sort_index().items()},
+        "mean_symptoms": {
+            k: round(v, 3) for k, v in df[SYMPTOM_COLUMNS].sum(axis=1).groupby(df["risk"]).mean().items()
+        },
+    }
+
+
+def run(sizes=DEFAULT_SIZES, repeats: int = 3, seed: int = 42) -> dict:
+    generate_synthetic_data(100, seed=seed)  # Import/first-call costs outside the timings
+    results = [time_generation(n, repeats, seed) for n in sizes]
+    # Log-log slope between consecutive sizes: ~1.0 means linear growth
+    for prev, cur in zip(results, results[1:]):
+        cur["scaling_exponent"] = round(
+            math.log(cur["seconds"] / prev["seconds"]) / math.log(cur["rows"] / prev["rows"]), 2
+        )
+    return {"seed": seed, "repeats": repeats, "results": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(json.dumps(run(args.sizes, args.repeats, args.seed), indent=2))
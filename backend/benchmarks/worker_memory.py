@@ -0,0 +1,96 @@
+"""Per-worker memory and model load time: unpickled sklearn forest vs memory-mapped compiled export."""
+
+import argparse
+import json
+import multiprocessing as mp
+import time
+
+
+def _memory_mb() -> dict:
+    """RSS, PSS (shared pages split between the processes mapping them) and private memory."""
+    fields = {}
+    with open("/proc/self/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss": fields.get("Rss", 0.0),
+        "pss": fields.get("Pss", 0.0),
+        "private": fields.get("Private_Clean", 0.0) + fields.get("Private_Dirty", 0.0),
+    }
+
+
+def _worker(mode: str, results, release) -> None:
+    import json as json_
+
+    import joblib
+    import shap  # noqa: F401  Imported up front so the deltas below are model memory, not library code
+    import sklearn.ensemble  # noqa: F401
+
+    from ml.inference import explain_inferences, infer
+    from ml.registry import ModelBundle, artifact_store, load_bundle
+
+    model_dir = artifact_store.current_dir()
+    before = _memory_mb()
+    t0 = time.perf_counter()
+    if mode == "mmap":
+        bundle = load_bundle(model_dir)
+    else:
+        with open(model_dir / "meta.json") as f:
+            meta = json_.load(f)
+        bundle = ModelBundle(
+            model=joblib.load(model_dir / "risk_model.joblib"),
+            scaler=joblib.load(model_dir / "scaler.joblib"),
+            meta=meta,
+        )
+    bundle.forest()
+    bundle.explainer()
+    load_ms = 1000 * (time.perf_counter() - t0)
+    loaded = _memory_mb()
+    # First scored + explained admission; with Numba installed this also pulls in its runtime
+    inference = infer(
+        age=60, gender="Male", heart_rate=110, blood_pressure_systolic=150, blood_pressure_diastolic=95,
+        temperature=38.2, spo2=92, chronic_disease_count=2, respiratory_rate=24, pain_score=7,
+        symptom_duration=12, symptoms=["chest_pain"], bundle=bundle,
+    )
+    explain_inferences([inference])
+    serving = _memory_mb()
+    results.put({
+        "load_ms": load_ms,
+        "model_rss_mb": loaded["rss"] - before["rss"],
+        "model_private_mb": loaded["private"] - before["private"],
+        "first_inference_rss_mb": serving["rss"] - loaded["rss"],
+        "rss_mb": serving["rss"],
+        "pss_mb": serving["pss"],
+    })
+    release.wait()  # Stay alive until every worker has measured, so PSS reflects the sharing
+
+
+def _measure(mode: str, workers: int) -> dict:
+    ctx = mp.get_context("spawn")
+    results, release = ctx.Queue(), ctx.Event()
+    procs = [ctx.Process(target=_worker, args=(mode, results, release)) for _ in range(workers)]
+    for p in procs:
+        p.start()
+    rows = [results.get() for _ in procs]
+    release.set()
+    for p in procs:
+        p.join()
+    return {key: round(sum(r[key] for r in rows) / len(rows), 2) for key in rows[0]}
+
+
+def run(workers: int = 4) -> dict:
+    from ml.compiled_forest import COMPILED_FOREST_DIR
+    from ml.registry import artifact_store
+
+    if not (artifact_store.current_dir() / COMPILED_FOREST_DIR).exists():
+        raise SystemExit("No compiled export; run python -m ml.train_model --export-only first")
+    return {"workers": workers, "per_worker": {mode: _measure(mode, workers) for mode in ("pickle", "mmap")}}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+    print(json.dumps(run(args.workers), indent=2))
@@ -0,0 +1,256 @@
+"""Versioned model artifacts: one directory per meta["version"] under artifacts/versions/, plus an atomically swapped pointer."""
+
+import contextlib
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from ml.compiled_forest import COMPILED_FOREST_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows: pointer updates are only serialized within one process
+    fcntl = None
+
+MODEL_DIR = Path(__file__).resolve().parent / "artifacts"
+ARTIFACT_FILES = ("risk_model.joblib", "scaler.joblib", COMPILED_FOREST_DIR, "meta.json")
+POINTER_FILE = "current.json"
+CANDIDATE_FILE = "candidate.json"  # Shadow candidate every worker scores alongside the live version
+LOCK_FILE = ".lock"  # In versions/; flock'ed around every read-modify-write of the pointer
+# Versions kept on disk; the live version and its rollback target are never pruned
+MODEL_VERSIONS_KEEP = int(os.getenv("MODEL_VERSIONS_KEEP", "5"))
+
+
+class StaleRollbackError(RuntimeError):
+    """The rollback target changed (another process promoted or rolled back) since it was looked up."""
+
+
+class ArtifactStore:
+    """
+    Layout under root:
+      versions/<version>/  risk_model.joblib, scaler.joblib, compiled_forest/, meta.json (never modified once added)
+      current.json         {"version": ..., "previous": [...], "promoted_at": ...}, replaced with os.replace
+      candidate.json       {"version": ..., "staged_at": ...} while a shadow candidate is registered
+      staging/<id>/        where train() writes before the finished directory is renamed into versions/
+    A reader resolves current.json once and then only opens files inside one version directory, so it
+    can never mix files from two versions. Without current.json (a fresh checkout) the flat files in
+    root are the live model.
+    """
+
+    def __init__(self, root: Path = MODEL_DIR, keep: int = MODEL_VERSIONS_KEEP):
+        self.root = Path(root)
+        self.keep = keep
+        self.versions_dir = self.root / "versions"
+        self.pointer_path = self.root / POINTER_FILE
+        self.candidate_path = self.root / CANDIDATE_FILE
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Exclusive across threads and, via flock on versions/.lock, across processes sharing root."""
+        with self._lock:
+            self.versions_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.versions_dir / LOCK_FILE, "a") as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)  # Released when f is closed
+                yield
+
+    def _read_pointer(self, path: Path | None = None) -> dict:
+        try:
+            with open(path or self.pointer_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write_pointer(self, pointer: dict, path: Path | None = None) -> None:
+        path = path or self.pointer_path
+        tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(pointer, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+
+    def stamp(self, path: Path | None = None) -> tuple | None:
+        """Cheap change marker for the pointer (one stat call): os.replace gives it a new inode."""
+        try:
+            st = os.stat(path or self.pointer_path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns
+
+    def current_version(self) -> str | None:
+        return self._read_pointer().get("version")
+
+    def current_dir(self) -> Path:
+        """Directory of the live model: the pointed-to version, or the legacy flat layout in root."""
+        version = self.current_version()
+        return self.version_dir(version) if version else self.root
+
+    def version_dir(self, version: str) -> Path:
+        """Directory of an existing version; raises LookupError if it is not in the store."""
+        path = self.versions_dir / version
+        if Path(version).name != version or not (path / "meta.json").exists():
+            raise LookupError(f"Model version {version!r} not found")
+        return path
+
+    def staging_dir(self) -> Path:
+        """Fresh directory to train into; add(..., move=True) renames it into versions/."""
+        path = self.root / "staging" / uuid.uuid4().hex[:12]
+        path.mkdir(parents=True)
+        return path
+
+    def add(self, source_dir: Path, move: bool = False) -> str:
+        """
+        Add a trained model directory as versions/<meta version> and return the version. The
+        directory only appears under versions/ once complete: moved with a rename (move=True,
+        same filesystem) or copied to a temporary name first. Raises FileExistsError if the
+        version is already stored.
+        """
+        source_dir = Path(source_dir)
+        with open(source_dir / "meta.json") as f:
+            version = str(json.load(f)["version"])
+        dest = self.versions_dir / version
+        if dest.exists():
+            raise FileExistsError(f"Model version {version} is already in the store")
+        self.versions_dir.mkdir(parents=True, exist_ok=True)
+        if move:
+            os.replace(source_dir, dest)
+        else:
+            tmp = self.versions_dir / f".{version}.tmp"
+            shutil.rmtree(tmp, ignore_errors=True)
+            tmp.mkdir()
+            for name in ARTIFACT_FILES:
+                copy = shutil.copytree if (source_dir / name).is_dir() else shutil.copyfile
+                copy(source_dir / name, tmp / name)
+            os.replace(tmp, dest)
+        return version
+
+    def _import_legacy(self) -> str | None:
+        """Copy a flat-layout model in root into the store, so it stays a rollback target."""
+        if not (self.root / "meta.json").exists():
+            return None
+        try:
+            return self.add(self.root)
+        except FileExistsError:
+            with open(self.root / "meta.json") as f:
+                return str(json.load(f)["version"])
+
+    def promote(self, version: str) -> str | None:
+        """Point current.json at version (the old one becomes the rollback target); returns the previous version."""
+        self.version_dir(version)
+        with self._locked():
+            pointer = self._read_pointer()
+            previous = pointer.get("version") or self._import_legacy()
+            history = [v for v in pointer.get("previous", []) if v != version and (self.versions_dir / v).exists()]
+            if previous and previous != version:
+                history.append(previous)
+            self._write_pointer({
+                "version": version,
+                "previous": history[-self.keep:],
+                "promoted_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            })
+            self._prune()
+        return previous
+
+    def _rollback_target(self, pointer: dict) -> str:
+        for version in reversed(pointer.get("previous", [])):
+            if (self.versions_dir / version / "meta.json").exists():
+                return version
+        raise LookupError("No previous model version to roll back to")
+
+    def rollback_target(self) -> str:
+        """The version rollback() would restore; raises LookupError if there is none."""
+        return self._rollback_target(self._read_pointer())
+
+    def rollback(self, expected: str | None = None) -> str:
+        """
+        Point current.json back at the previously promoted version; returns it. With expected (the
+        version the caller looked up and prepared) raises StaleRollbackError if the target has
+        changed since, rather than switching to a version the caller did not prepare.
+        """
+        with self._locked():
+            pointer = self._read_pointer()
+            target = self._rollback_target(pointer)
+            if expected is not None and target != expected:
+                raise StaleRollbackError(f"Rollback target is now {target}, not {expected}")
+            history = pointer.get("previous", [])
+            self._write_pointer({
+                "version": target,
+                "previous": history[: len(history) - 1 - history[::-1].index(target)],
+                "promoted_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            })
+        return target
+
+    def candidate_stamp(self) -> tuple | None:
+        return self.stamp(self.candidate_path)
+
+    def candidate_version(self) -> str | None:
+        return self._read_pointer(self.candidate_path).get("version")
+
+    def set_candidate(self, version: str) -> None:
+        """Register a stored version as the shadow candidate (replacing any other); LookupError if unknown."""
+        self.version_dir(version)
+        with self._locked():
+            self._write_pointer(
+                {"version": version, "staged_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())},
+                self.candidate_path,
+            )
+
+    def clear_candidate(self, version: str | None = None) -> str | None:
+        """
+        Unregister the shadow candidate (only if it is still `version`, when given); returns the
+        version cleared, or None. Its directory stays in versions/ until prune() ages it out.
+        """
+        with self._locked():
+            current = self.candidate_version()
+            if current is None or (version is not None and current != version):
+                return None
+            self._write_pointer({}, self.candidate_path)
+            return current
+
+    def versions(self) -> list[dict]:
+        """Stored versions, newest first, with their headline metadata."""
+        pointer = self._read_pointer()
+        candidate = self.candidate_version()
+        out = []
+        for path in self.versions_dir.glob("*/meta.json") if self.versions_dir.exists() else []:
+            if path.parent.name.startswith("."):
+                continue  # Copy in progress
+            with open(path) as f:
+                meta = json.load(f)
+            out.append({
+                "version": path.parent.name,
+                "trained_at": meta.get("trained_at"),
+                "test_accuracy": meta.get("test_accuracy"),
+                "n_estimators": meta.get("hyperparameters", {}).get("n_estimators"),
+                "history_mode": meta.get("history", {}).get("mode"),
+                "current": path.parent.name == pointer.get("version"),
+                "candidate": path.parent.name == candidate,
+            })
+        return sorted(out, key=lambda v: (v["trained_at"] or "", v["version"]), reverse=True)
+
+    def prune(self) -> list[str]:
+        """
+        Delete all but the newest `keep` versions, always keeping the live one, its rollback target
+        and the shadow candidate.
+        """
+        with self._locked():
+            return self._prune()
+
+    def _prune(self) -> list[str]:
+        pointer = self._read_pointer()
+        protected = {pointer.get("version"), *pointer.get("previous", [])[-1:], self.candidate_version()}
+        removed = []
+        for entry in self.versions()[self.keep:]:
+            if entry["version"] not in protected:
+                shutil.rmtree(self.versions_dir / entry["version"], ignore_errors=True)
+                removed.append(entry["version"])
+        return removed
+
+
+artifact_store = ArtifactStore()
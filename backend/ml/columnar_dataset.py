@@ -0,0 +1,277 @@
+"""Typed columnar training dataset: one memory-mappable .npy per column plus schema.json and summary.json."""
+
+import io
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Iterable, Iterator
+
+import numpy as np
+
+from ml.preprocessing import ALL_FEATURES, GENDER_MAP, NUMERIC_FEATURES, SYMPTOM_COLUMNS
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+COLUMNAR_DATASET_DIR = DATA_DIR / "triage_dataset"
+SCHEMA_FILE = "schema.json"
+SUMMARY_FILE = "summary.json"
+RISK_LABELS = ["low", "medium", "high"]
+GENDER_LABELS = sorted(GENDER_MAP, key=GENDER_MAP.get)
+# DataFrame layout of generate_synthetic_data, which load_frame() reproduces
+FRAME_COLUMNS = [NUMERIC_FEATURES[0], "gender", *NUMERIC_FEATURES[1:], "risk", *SYMPTOM_COLUMNS]
+# Vitals as float32 (integer vitals are exact; temperature keeps ~7 significant digits, the precision
+# sklearn's trees split on anyway), categoricals and symptoms as int8 codes
+COLUMN_DTYPES = {
+    **{col: np.dtype(np.float32) for col in NUMERIC_FEATURES},
+    "gender_enc": np.dtype(np.int8),  # GENDER_MAP codes, as build_features encodes them
+    "risk": np.dtype(np.int8),  # Index into RISK_LABELS
+    **{col: np.dtype(np.int8) for col in SYMPTOM_COLUMNS},
+}
+
+
+def _npy_header(dtype: np.dtype, rows: int) -> bytes:
+    buf = io.BytesIO()
+    header = {"descr": np.lib.format.dtype_to_descr(dtype), "fortran_order": False, "shape": (rows,)}
+    np.lib.format.write_array_header_1_0(buf, header)
+    return buf.getvalue()
+
+
+def _encode(values, labels: list[str], default: int | None = None) -> np.ndarray:
+    values = np.asarray(values, dtype=str)
+    codes = np.full(len(values), -1 if default is None else default, dtype=np.int8)
+    for code, label in enumerate(labels):
+        codes[values == label] = code
+    if default is None and (codes < 0).any():
+        raise ValueError(f"Unknown values {sorted(set(values[codes < 0]))[:5]}; expected one of {labels}")
+    return codes
+
+
+class _SummaryStats:
+    """Streaming per-column and per-risk-class sums, so summary.json never needs a second pass."""
+
+    def __init__(self):
+        n_classes = len(RISK_LABELS)
+        self.class_counts = np.zeros(n_classes, dtype=np.int64)
+        self.gender_counts = np.zeros(len(GENDER_LABELS), dtype=np.int64)
+        self.sums = {col: np.zeros(n_classes) for col in NUMERIC_FEATURES + SYMPTOM_COLUMNS}
+        self.sumsq = {col: 0.0 for col in NUMERIC_FEATURES}
+        self.mins = {col: np.inf for col in NUMERIC_FEATURES}
+        self.maxs = {col: -np.inf for col in NUMERIC_FEATURES}
+
+    def update(self, columns: dict[str, np.ndarray]) -> None:
+        risk = columns["risk"]
+        n_classes = len(RISK_LABELS)
+        self.class_counts += np.bincount(risk, minlength=n_classes)
+        self.gender_counts += np.bincount(columns["gender_enc"], minlength=len(GENDER_LABELS))
+        for col, sums in self.sums.items():
+            sums += np.bincount(risk, weights=columns[col], minlength=n_classes)
+        for col in NUMERIC_FEATURES:
+            values = columns[col].astype(np.float64)
+            self.sumsq[col] += float(np.dot(values, values))
+            if len(values):
+                self.mins[col] = min(self.mins[col], float(values.min()))
+                self.maxs[col] = max(self.maxs[col], float(values.max()))
+
+    def snapshot(self) -> dict:
+        rows = int(self.class_counts.sum())
+        per_class = np.maximum(self.class_counts, 1)
+
+        def by_risk(sums):
+            return {label: round(float(sums[i] / per_class[i]), 4) for i, label in enumerate(RISK_LABELS)}
+
+        numeric = {}
+        for col in NUMERIC_FEATURES:
+            mean = float(self.sums[col].sum()) / max(rows, 1)
+            var = max(self.sumsq[col] / max(rows, 1) - mean * mean, 0.0)
+            numeric[col] = {
+                "mean": round(mean, 4), "std": round(var ** 0.5, 4),
+                "min": self.mins[col] if rows else None, "max": self.maxs[col] if rows else None,
+                "mean_by_risk": by_risk(self.sums[col]),
+            }
+        symptom_counts = sum(self.sums[col] for col in SYMPTOM_COLUMNS)
+        return {
+            "rows": rows,
+            "class_distribution": {label: int(c) for label, c in zip(RISK_LABELS, self.class_counts)},
+            "gender_distribution": {label: int(c) for label, c in zip(GENDER_LABELS, self.gender_counts)},
+            "numeric": numeric,
+            "symptom_prevalence": {
+                col: {"overall": round(float(self.sums[col].sum()) / max(rows, 1), 4), "by_risk": by_risk(self.sums[col])}
+                for col in SYMPTOM_COLUMNS
+            },
+            "mean_symptoms_by_risk": by_risk(symptom_counts),
+        }
+
+
+class ColumnarWriter:
+    """
+    Append DataFrame chunks (generate_synthetic_data layout) column by column, so a dataset larger
+    than memory can be written from a stream. Each column is a .npy file whose header is written
+    with a zero length and rewritten in place on close() (the .npy header reserves room for that).
+    Everything goes to a temporary directory that replaces out_dir only once complete.
+    """
+
+    def __init__(self, out_dir: Path = COLUMNAR_DATASET_DIR, metadata: dict | None = None):
+        self.out_dir = Path(out_dir)
+        self.metadata = metadata or {}
+        self.tmp_dir = self.out_dir.with_name(self.out_dir.name + ".tmp")
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+        self.tmp_dir.mkdir(parents=True)
+        self.rows = 0
+        self._stats = _SummaryStats()
+        self._files = {}
+        for col, dtype in COLUMN_DTYPES.items():
+            f = open(self.tmp_dir / f"{col}.npy", "wb")
+            f.write(_npy_header(dtype, 0))
+            self._files[col] = f
+        self._started = time.perf_counter()
+
+    def append(self, df) -> None:
+        columns = {col: df[col].to_numpy(dtype=COLUMN_DTYPES[col]) for col in NUMERIC_FEATURES + SYMPTOM_COLUMNS}
+        # Unknown genders encode as "other", matching raw_feature_row
+        columns["gender_enc"] = _encode(df["gender"].to_numpy(), GENDER_LABELS, default=GENDER_MAP["other"])
+        columns["risk"] = _encode(df["risk"].to_numpy(), RISK_LABELS)
+        for col, f in self._files.items():
+            f.write(np.ascontiguousarray(columns[col], dtype=COLUMN_DTYPES[col]).tobytes())
+        self._stats.update(columns)
+        self.rows += len(df)
+
+    def close(self) -> dict:
+        """Finalize headers, write schema.json and summary.json, publish out_dir; returns the summary."""
+        for col, f in self._files.items():
+            header = _npy_header(COLUMN_DTYPES[col], self.rows)
+            if len(header) != len(_npy_header(COLUMN_DTYPES[col], 0)):
+                raise RuntimeError(f"{col}.npy header grew past its reserved size")
+            f.seek(0)
+            f.write(header)
+            f.close()
+        self._files = {}
+        schema = {
+            "rows": self.rows,
+            "columns": {col: dtype.str for col, dtype in COLUMN_DTYPES.items()},
+            "categories": {"gender_enc": GENDER_LABELS, "risk": RISK_LABELS},
+            "feature_columns": ALL_FEATURES,
+        }
+        summary = {
+            **self._stats.snapshot(),
+            "metadata": self.metadata,
+            "written_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "write_seconds": round(time.perf_counter() - self._started, 3),
+        }
+        for name, content in ((SCHEMA_FILE, schema), (SUMMARY_FILE, summary)):
+            with open(self.tmp_dir / name, "w") as f:
+                json.dump(content, f, indent=2)
+        shutil.rmtree(self.out_dir, ignore_errors=True)
+        os.replace(self.tmp_dir, self.out_dir)
+        return summary
+
+    def abort(self) -> None:
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+        elif self._files:
+            self.close()
+
+
+def write_columnar(chunks, out_dir: Path = COLUMNAR_DATASET_DIR, metadata: dict | None = None) -> dict:
+    """Write one DataFrame or an iterable of chunks as a columnar dataset; returns the summary."""
+    writer = ColumnarWriter(out_dir, metadata)
+    try:
+        for chunk in [chunks] if hasattr(chunks, "columns") else chunks:
+            writer.append(chunk)
+    except BaseException:
+        writer.abort()
+        raise
+    return writer.close()
+
+
+def read_schema(path: Path = COLUMNAR_DATASET_DIR) -> dict:
+    with open(Path(path) / SCHEMA_FILE) as f:
+        return json.load(f)
+
+
+def read_summary(path: Path = COLUMNAR_DATASET_DIR) -> dict | None:
+    """Precomputed statistics for the dataset at path, or None if it has not been written."""
+    try:
+        with open(Path(path) / SUMMARY_FILE) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def open_columns(path: Path = COLUMNAR_DATASET_DIR, columns: Iterable[str] | None = None) -> dict[str, np.ndarray]:
+    """Read-only memory maps of the stored columns (codes, not labels, for gender_enc and risk)."""
+    path = Path(path)
+    names = list(columns) if columns is not None else list(read_schema(path)["columns"])
+    return {col: np.load(path / f"{col}.npy", mmap_mode="r") for col in names}
+
+
+def load_feature_matrix(
+    path: Path = COLUMNAR_DATASET_DIR, dtype=np.float32, rows: slice = slice(None)
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    (X, y): X has build_features(df) columns in ALL_FEATURES order, y the risk labels. X is
+    filled column by column straight from the memory maps into a Fortran-ordered matrix, so no
+    intermediate DataFrame is built. float32 is what sklearn's trees fit on internally anyway;
+    pass dtype=np.float64 for build_features' dtype.
+    """
+    columns = open_columns(path, ALL_FEATURES + ["risk"])
+    n = len(columns["risk"][rows])
+    X = np.empty((n, len(ALL_FEATURES)), dtype=dtype, order="F")
+    for j, col in enumerate(ALL_FEATURES):
+        X[:, j] = columns[col][rows]
+    y = np.asarray(RISK_LABELS)[columns["risk"][rows]]
+    return X, y
+
+
+def load_frame(path: Path = COLUMNAR_DATASET_DIR, columns: list[str] | None = None):
+    """The dataset as a DataFrame in the generate_synthetic_data layout (gender and risk as labels)."""
+    import pandas as pd
+
+    stored = open_columns(path)
+    frame = {}
+    for col in columns or FRAME_COLUMNS:
+        if col == "gender":
+            frame[col] = np.asarray(GENDER_LABELS)[stored["gender_enc"]]
+        elif col == "risk":
+            frame[col] = np.asarray(RISK_LABELS)[stored["risk"]]
+        else:
+            frame[col] = np.asarray(stored[col])
+    return pd.DataFrame(frame)
+
+
+def _csv_chunks(csv_path: Path, chunk_rows: int) -> Iterator:
+    import pandas as pd
+    yield from pd.read_csv(csv_path, chunksize=chunk_rows)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__)
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--rows", type=int, default=None, help="Generate this many synthetic rows (streamed in chunks)")
+    source.add_argument("--from-csv", type=Path, default=None, help="Convert a CSV in the triage_dataset.csv layout")
+    source.add_argument("--from-shards", type=Path, default=None, help="Convert ml.synthetic_shards output")
+    parser.add_argument("--chunk-rows", type=int, default=250_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", type=Path, default=COLUMNAR_DATASET_DIR)
+    args = parser.parse_args()
+    if args.rows is not None:
+        from ml.synthetic_shards import iter_synthetic_chunks
+        chunks, metadata = iter_synthetic_chunks(args.rows, args.chunk_rows, args.seed), {"source": "synthetic", "seed": args.seed}
+    elif args.from_shards is not None:
+        from ml.synthetic_shards import iter_shards
+        chunks, metadata = iter_shards(args.from_shards), {"source": str(args.from_shards)}
+    else:
+        csv_path = args.from_csv or DATA_DIR / "triage_dataset.csv"
+        chunks, metadata = _csv_chunks(csv_path, args.chunk_rows), {"source": str(csv_path)}
+    summary = write_columnar(chunks, args.out, metadata)
+    print(f"Wrote {summary['rows']} rows to {args.out} in {summary['write_seconds']} s: {summary['class_distribution']}")
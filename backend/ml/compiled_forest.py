@@ -0,0 +1,306 @@
+"""Compiled RandomForest: trees flattened into contiguous arrays and a NumPy (optionally Numba) evaluator."""
+
+import importlib.util
+import json
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+# Directory of one .npy file per array, so every worker can np.load(mmap_mode="r") the same pages
+COMPILED_FOREST_DIR = "compiled_forest"
+_ARRAYS = (
+    "feature", "threshold", "children", "leaf_proba", "roots", "classes",
+    "feature_mean", "feature_scale", "model_threshold", "node_weight", "feature_importances",
+)
+_CHUNK_ROWS = 2048  # Bounds the (rows, trees, classes) intermediate
+_SEARCH_LIMIT = 1e300  # Folded thresholds are searched within +/- this range
+_SIGN_BIT = np.uint64(0x8000000000000000)
+_ONE, _TWO = np.uint64(1), np.uint64(2)
+
+# Numba is optional and only imported (and the kernel compiled) on the first predict_proba call
+_NUMBA_AVAILABLE = importlib.util.find_spec("numba") is not None
+_numba_kernel = None
+
+
+@dataclass(frozen=True)
+class CompiledForest:
+    """
+    All trees of a fitted RandomForestClassifier in flat arrays, indexed by global node id.
+
+    Leaves point to themselves in `children`, so every row can walk `depth` levels without
+    branching. Evaluation reproduces sklearn's predict_proba bit for bit: inputs are cast to
+    float32 like sklearn's input validation, per-tree leaf distributions are summed in tree
+    order and divided by the number of trees.
+
+    After fold_scaler() the thresholds are in raw feature units: the forest takes unscaled
+    float64 vitals directly and carries the scaler's mean/scale for callers that still need
+    the scaled vector (SHAP, top features).
+
+    node_weight and model_threshold are not needed for prediction; they let shap.TreeExplainer
+    be built from these arrays (shap_model) instead of the unpickled sklearn forest.
+    """
+
+    feature: np.ndarray  # int64 (n_nodes,) split feature; 0 for leaves
+    threshold: np.ndarray  # float64 (n_nodes,) go left if x[feature] <= threshold
+    children: np.ndarray  # int64 (n_nodes, 2) [left, right]; leaves hold their own id
+    leaf_proba: np.ndarray  # float64 (n_nodes, n_classes) class distribution at each node
+    roots: np.ndarray  # int64 (n_trees,) global id of each tree's root
+    classes: np.ndarray  # class labels, same order as model.classes_
+    depth: int  # max tree depth = number of traversal steps
+    version: str = ""  # model version the arrays were exported from
+    feature_mean: np.ndarray | None = None  # Set when the scaler is folded into thresholds
+    feature_scale: np.ndarray | None = None
+    model_threshold: np.ndarray | None = None  # Thresholds in the units the sklearn model saw (kept when folding)
+    node_weight: np.ndarray | None = None  # float64 (n_nodes,) weighted_n_node_samples, for SHAP
+    feature_importances: np.ndarray | None = None  # model.feature_importances_
+
+    @property
+    def raw_input(self) -> bool:
+        """True when thresholds are in raw units (scaler folded in)."""
+        return self.feature_mean is not None
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @classmethod
+    def from_sklearn(cls, model, version: str = "") -> "CompiledForest":
+        """Flatten a fitted RandomForestClassifier (single output)."""
+        features, thresholds, children, values, weights, roots = [], [], [], [], [], []
+        offset = 0
+        depth = 0
+        n_classes = len(model.classes_)
+        for est in model.estimators_:
+            tree = est.tree_
+            n = tree.node_count
+            ids = np.arange(offset, offset + n)
+            is_leaf = tree.children_left == -1
+            left = np.where(is_leaf, ids, tree.children_left + offset)
+            right = np.where(is_leaf, ids, tree.children_right + offset)
+            features.append(np.where(is_leaf, 0, tree.feature))
+            thresholds.append(np.where(is_leaf, 0.0, tree.threshold))
+            children.append(np.stack([left, right], axis=1))
+            values.append(tree.value[:, 0, :n_classes])
+            weights.append(tree.weighted_n_node_samples)
+            roots.append(offset)
+            depth = max(depth, int(tree.max_depth))
+            offset += n
+        return cls(
+            feature=np.ascontiguousarray(np.concatenate(features), dtype=np.int64),
+            threshold=np.ascontiguousarray(np.concatenate(thresholds), dtype=np.float64),
+            children=np.ascontiguousarray(np.concatenate(children), dtype=np.int64),
+            leaf_proba=np.ascontiguousarray(np.concatenate(values), dtype=np.float64),
+            roots=np.asarray(roots, dtype=np.int64),
+            classes=np.asarray(model.classes_),
+            depth=depth,
+            version=version,
+            node_weight=np.ascontiguousarray(np.concatenate(weights), dtype=np.float64),
+            feature_importances=np.asarray(model.feature_importances_, dtype=np.float64),
+        )
+
+    def fold_scaler(self, scaler) -> "CompiledForest":
+        """
+        Rewrite split thresholds into raw feature units so inference can skip scaling.
+
+        The scaled pipeline goes left when float32((x - mean) / scale) <= t. That test is
+        monotone in x, so it equals x <= t' for the largest float64 t' that still passes;
+        t' is found per node by bisection over the ordered float64 bit patterns. The result
+        is exact for every input value, not only the ones seen in training.
+        """
+        if self.raw_input:
+            return self
+        mean = np.asarray(scaler.mean_, dtype=np.float64)
+        scale = np.asarray(scaler.scale_, dtype=np.float64)
+        m, sc, t = mean[self.feature], scale[self.feature], self.threshold
+
+        def goes_left(x):
+            with np.errstate(over="ignore"):
+                return ((x - m) / sc).astype(np.float32) <= t
+
+        lo = np.full(len(t), _float_to_key(np.float64(-_SEARCH_LIMIT)))
+        hi = np.full(len(t), _float_to_key(np.float64(_SEARCH_LIMIT)))
+        never_left = ~goes_left(_key_to_float(lo))
+        always_left = goes_left(_key_to_float(hi))
+        while True:
+            open_ = hi - lo > _ONE
+            if not open_.any():
+                break
+            mid = lo + (hi - lo) // _TWO
+            ok = goes_left(_key_to_float(mid))
+            lo = np.where(open_ & ok, mid, lo)
+            hi = np.where(open_ & ~ok, mid, hi)
+        folded = _key_to_float(lo)
+        folded[never_left] = -np.inf
+        folded[always_left] = np.inf
+        return CompiledForest(
+            feature=self.feature,
+            threshold=folded,
+            children=self.children,
+            leaf_proba=self.leaf_proba,
+            roots=self.roots,
+            classes=self.classes,
+            depth=self.depth,
+            version=self.version,
+            feature_mean=mean,
+            feature_scale=scale,
+            model_threshold=self.threshold,
+            node_weight=self.node_weight,
+            feature_importances=self.feature_importances,
+        )
+
+    def scale(self, X_raw: np.ndarray) -> np.ndarray:
+        """Scaled features, same arithmetic as StandardScaler.transform (folded forests only)."""
+        return (X_raw - self.feature_mean) / self.feature_scale
+
+    def leaves(self, X: np.ndarray) -> np.ndarray:
+        """(n_rows, n_trees) global leaf id reached by each row in each tree."""
+        # sklearn casts inputs to float32 before comparing; folded thresholds expect raw float64
+        X = np.asarray(X, dtype=np.float64 if self.raw_input else np.float32)
+        if len(X) == 1:
+            x = X[0]
+            node = self.roots
+            for _ in range(self.depth):
+                node = self.children[node, (x[self.feature[node]] > self.threshold[node]).view(np.int8)]
+            return node[np.newaxis, :]
+        rows = np.arange(len(X))[:, np.newaxis]
+        node = np.broadcast_to(self.roots, (len(X), self.n_trees))
+        for _ in range(self.depth):
+            go_right = X[rows, self.feature[node]] > self.threshold[node]
+            node = self.children[node, go_right.view(np.int8)]
+        return node
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Class probabilities, identical to RandomForestClassifier.predict_proba."""
+        if _NUMBA_AVAILABLE:
+            return _predict_proba_kernel()(
+                np.asarray(X, dtype=np.float64 if self.raw_input else np.float32), self.feature, self.threshold, self.children,
+                self.leaf_proba, self.roots, self.depth,
+            )
+        X = np.asarray(X)
+        out = np.empty((len(X), self.leaf_proba.shape[1]), dtype=np.float64)
+        for start in range(0, len(X), _CHUNK_ROWS):
+            per_tree = self.leaf_proba[self.leaves(X[start:start + _CHUNK_ROWS])]  # (rows, trees, classes)
+            # cumsum adds strictly in tree order, matching sklearn's sequential `out += proba`
+            out[start:start + _CHUNK_ROWS] = np.cumsum(per_tree, axis=1)[:, -1, :]
+        return out / self.n_trees
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+
+    def shap_model(self) -> dict:
+        """
+        Per-tree dicts in shap's custom tree format. shap.TreeExplainer on this gives the same
+        values as on the sklearn forest: same thresholds and float32 inputs, leaf distributions
+        normalized and scaled by 1 / n_trees exactly as shap does for RandomForestClassifier.
+        """
+        if self.node_weight is None:
+            raise ValueError("Compiled forest was exported without node weights; explain the sklearn model instead")
+        thresholds = self.threshold if self.model_threshold is None else self.model_threshold
+        scaling = 1.0 / self.n_trees
+        trees = []
+        for start, end in zip(self.roots, [*self.roots[1:], len(self.feature)]):
+            children = self.children[start:end]
+            is_leaf = children[:, 0] == np.arange(start, end)
+            left = np.where(is_leaf, -1, children[:, 0] - start)
+            values = np.asarray(self.leaf_proba[start:end])
+            trees.append({
+                "children_left": left,
+                "children_right": np.where(is_leaf, -1, children[:, 1] - start),
+                "children_default": left,
+                "features": np.where(is_leaf, -2, self.feature[start:end]),
+                "thresholds": np.where(is_leaf, -2.0, thresholds[start:end]),
+                "values": (values.T / values.sum(1)).T * scaling,
+                "node_sample_weight": np.array(self.node_weight[start:end]),
+            })
+        return {
+            "trees": trees,
+            "input_dtype": np.float32,
+            "internal_dtype": np.float64,
+            "tree_output": "probability",
+            "objective": "binary_crossentropy",
+        }
+
+    def save(self, path: Path) -> None:
+        """Write the arrays as .npy files into directory `path`, replacing any previous export."""
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        for name in _ARRAYS:
+            value = getattr(self, name)
+            if value is not None:
+                np.save(tmp / f"{name}.npy", value.astype(str) if name == "classes" else value)
+        with open(tmp / "forest.json", "w") as f:
+            json.dump({"version": self.version, "depth": self.depth}, f)
+        old = path.with_name(path.name + ".old")
+        if path.exists():
+            os.replace(path, old)
+        os.replace(tmp, path)
+        shutil.rmtree(old, ignore_errors=True)
+
+    @classmethod
+    def load(cls, path: Path, mmap_mode: str | None = "r") -> "CompiledForest":
+        """Map an export read-only; processes loading the same files share their physical pages."""
+        path = Path(path)
+        with open(path / "forest.json") as f:
+            info = json.load(f)
+        arrays = {
+            name: np.load(path / f"{name}.npy", mmap_mode=mmap_mode, allow_pickle=False)
+            for name in _ARRAYS
+            if (path / f"{name}.npy").exists()
+        }
+        return cls(depth=int(info["depth"]), version=str(info["version"]), **arrays)
+
+
+def _float_to_key(x):
+    """Map float64 to uint64 keys that sort in the same order as the floats."""
+    bits = np.asarray(x, dtype=np.float64).view(np.uint64)
+    return np.where(bits & _SIGN_BIT, ~bits, bits | _SIGN_BIT)
+
+
+def _key_to_float(key):
+    key = np.asarray(key, dtype=np.uint64)
+    bits = np.where(key & _SIGN_BIT, key & ~_SIGN_BIT, ~key)
+    return bits.view(np.float64)
+
+
+def verify_compiled_forest(model, compiled: CompiledForest, X: np.ndarray, X_raw: np.ndarray | None = None) -> None:
+    """
+    Raise ValueError unless the compiled evaluator matches model.predict_proba exactly.
+    X is the scaled matrix sklearn sees; folded forests are evaluated on X_raw instead.
+    """
+    expected = model.predict_proba(X)
+    if compiled.raw_input:
+        X = X_raw
+    actual = compiled.predict_proba(X)
+    if not np.array_equal(expected, actual):
+        n_bad = int((expected != actual).any(axis=1).sum())
+        raise ValueError(f"Compiled forest differs from sklearn on {n_bad} of {len(X)} rows")
+    single = np.vstack([compiled.predict_proba(X[i:i + 1]) for i in range(min(len(X), 200))])
+    if not np.array_equal(expected[:len(single)], single):
+        raise ValueError("Compiled forest single-row path differs from sklearn")
+
+
+def _predict_proba_kernel():
+    global _numba_kernel
+    if _numba_kernel is None:
+        import numba
+        _numba_kernel = numba.njit(cache=True, nogil=True)(_predict_proba_loops)
+    return _numba_kernel
+
+
+def _predict_proba_loops(X, feature, threshold, children, leaf_proba, roots, depth):
+    """Row-by-row traversal; compiled with Numba by _predict_proba_kernel."""
+    n_rows, n_trees, n_classes = X.shape[0], roots.shape[0], leaf_proba.shape[1]
+    out = np.zeros((n_rows, n_classes))
+    for i in range(n_rows):
+        for t in range(n_trees):
+            node = roots[t]
+            for _ in range(depth):
+                node = children[node, 1 if X[i, feature[node]] > threshold[node] else 0]
+            for c in range(n_classes):
+                out[i, c] += leaf_proba[node, c]
+    return out / n_trees
@@ -1,31 +1,125 @@
 """Risk prediction and explainability (top features, abnormal vitals, SHAP)."""
 
-import json
-from pathlib import Path
+import importlib.util
+import time
+from dataclasses import dataclass
 
-import joblib
 import numpy as np
 
-from app.schemas import AbnormalityAlert
-from app.validation import get_abnormality_alerts
-from ml.preprocessing import ALL_FEATURES, preprocess_single
+from ml.prediction_cache import prediction_cache
+from ml.preprocessing import ALL_FEATURES, patients_to_columns, raw_feature_matrix, raw_feature_row
+from ml.registry import ModelBundle, get_bundle
 
-MODEL_DIR = Path(__file__).resolve().parent / "artifacts"
+COMPILED_MAX_BATCH = 256
+SHAP_TOP_K = 10
+# Any valid intake works; warm_up only needs to exercise the code paths
+_WARMUP_PATIENT = dict(
+    age=50, gender="female", heart_rate=88, blood_pressure_systolic=128, blood_pressure_diastolic=82,
+    temperature=37.0, spo2=97, chronic_disease_count=1, respiratory_rate=16, pain_score=3,
+    symptom_duration=24, symptoms=["headache"],
+)
 
-_SHAP_AVAILABLE = False
-try:
-    import shap
-    _SHAP_AVAILABLE = True
-except ImportError:
-    pass
+# shap (and the pandas/scipy/sklearn it pulls in) is imported when the explainer is first built
+_SHAP_AVAILABLE = importlib.util.find_spec("shap") is not None
 
 
-def _load_artifacts():
-    model = joblib.load(MODEL_DIR / "risk_model.joblib")
-    scaler = joblib.load(MODEL_DIR / "scaler.joblib")
-    with open(MODEL_DIR / "meta.json") as f:
-        meta = json.load(f)
-    return model, scaler, meta
+@dataclass(frozen=True)
+class TriageInference:
+    """
+    Result of one preprocessing pass and one model evaluation for a patient.
+    Prediction and explanation both read from it instead of recomputing.
+    """
+
+    bundle: ModelBundle
+    X: np.ndarray  # Scaled feature vector, shape (1, n_features)
+    probabilities: np.ndarray  # Class probabilities in bundle.classes order
+    predicted_index: int
+    cache_key: tuple | None = None  # prediction_cache key, also used to memoize SHAP for the row
+
+    @property
+    def classes(self) -> list[str]:
+        return self.bundle.classes
+
+    @property
+    def risk_level(self) -> str:
+        return self.classes[self.predicted_index]
+
+
+def infer(
+    age: int,
+    gender: str,
+    heart_rate: int,
+    blood_pressure_systolic: int,
+    blood_pressure_diastolic: int,
+    temperature: float,
+    spo2: int,
+    chronic_disease_count: int,
+    respiratory_rate: int,
+    pain_score: int,
+    symptom_duration: int,
+    symptoms: list[str],
+    bundle: ModelBundle | None = None,
+) -> TriageInference:
+    """Preprocess and evaluate the model once for a single patient."""
+    bundle = bundle or get_bundle()
+    raw = np.array([raw_feature_row(
+        age=age,
+        gender=gender,
+        heart_rate=heart_rate,
+        blood_pressure_systolic=blood_pressure_systolic,
+        blood_pressure_diastolic=blood_pressure_diastolic,
+        temperature=temperature,
+        spo2=spo2,
+        chronic_disease_count=chronic_disease_count,
+        respiratory_rate=respiratory_rate,
+        pain_score=pain_score,
+        symptom_duration=symptom_duration,
+        symptoms=symptoms,
+    )], dtype=np.float64)
+    X = bundle.scale(raw)
+    probs, keys = _cached_probabilities(bundle, raw, X)
+    # Same as model.predict: the class with the highest probability
+    return TriageInference(
+        bundle=bundle, X=X, probabilities=probs[0], predicted_index=int(np.argmax(probs[0])), cache_key=keys[0]
+    )
+
+
+def infer_batch(patients: list[dict], bundle: ModelBundle | None = None) -> list[TriageInference]:
+    """
+    Score many patients with one feature matrix and a single predict_proba call.
+    Each patient dict takes the same keyword arguments as infer; results keep input order.
+    """
+    bundle = bundle or get_bundle()
+    if not patients:
+        return []
+    raw = raw_feature_matrix(patients_to_columns(patients))
+    X = bundle.scale(raw)
+    probs, keys = _cached_probabilities(bundle, raw, X)
+    return [
+        TriageInference(
+            bundle=bundle, X=X[i:i + 1], probabilities=probs[i], predicted_index=int(np.argmax(probs[i])), cache_key=keys[i]
+        )
+        for i in range(len(patients))
+    ]
+
+
+def _predict_proba(bundle: ModelBundle, raw: np.ndarray, X: np.ndarray) -> np.ndarray:
+    # The compiled forest has the scaler folded into its thresholds, so it scores raw vitals.
+    # Flat-array evaluator wins for small batches; sklearn's Cython traversal for large ones (same output)
+    return bundle.forest().predict_proba(raw) if len(raw) <= COMPILED_MAX_BATCH else bundle.estimator().predict_proba(X)
+
+
+def _cached_probabilities(bundle: ModelBundle, raw: np.ndarray, X: np.ndarray) -> tuple[list, list]:
+    """Per-row probabilities and cache keys; only rows not seen before for this model version are scored."""
+    if not prediction_cache.enabled:
+        return list(_predict_proba(bundle, raw, X)), [None] * len(raw)
+    keys = prediction_cache.keys(bundle.version, raw)
+    entries = [prediction_cache.get(key) for key in keys]
+    missing = [i for i, entry in enumerate(entries) if entry is None]
+    if missing:
+        for i, p in zip(missing, _predict_proba(bundle, raw[missing], X[missing])):
+            entries[i] = prediction_cache.put(keys[i], p)
+    return [entry.probabilities for entry in entries], keys
 
 
 def predict_risk(
@@ -41,13 +135,13 @@ def predict_risk(
     pain_score: int,
     symptom_duration: int,
     symptoms: list[str],
+    bundle: ModelBundle | None = None,
 ) -> dict:
     """
     Predict risk level with probability breakdown and confidence.
-    Returns: risk_level, confidence_score, probability_breakdown, top_features, model
+    Returns: risk_level, confidence_score, probability_breakdown, top_features, meta, inference
     """
-    model, scaler, meta = _load_artifacts()
-    X = preprocess_single(
+    return summarize_inference(infer(
         age=age,
         gender=gender,
         heart_rate=heart_rate,
@@ -60,38 +154,107 @@ def predict_risk(
         pain_score=pain_score,
         symptom_duration=symptom_duration,
         symptoms=symptoms,
-        scaler=scaler,
-    )
-    pred = model.predict(X)[0]
-    probs = model.predict_proba(X)[0]
-    classes = list(model.classes_)
-    prob_dict = {c: float(p) for c, p in zip(classes, probs)}
+        bundle=bundle,
+    ))
+
+
+def predict_risk_batch(patients: list[dict], bundle: ModelBundle | None = None) -> list[dict]:
+    """Batch version of predict_risk (one predict_proba call for all patients)."""
+    return [summarize_inference(inf) for inf in infer_batch(patients, bundle)]
+
+
+def summarize_inference(inference: TriageInference) -> dict:
+    """Turn a TriageInference into the predict_risk result dict."""
+    meta = inference.bundle.meta
+    probs = inference.probabilities
+    prob_dict = {c: float(p) for c, p in zip(inference.classes, probs)}
     confidence = float(max(probs)) * 100
 
     # Top 3 contributing features (by feature_importances_ * abs difference from mean)
-    importances = model.feature_importances_
+    importances = inference.bundle.feature_importances
     feature_names = meta["feature_names"]
     # Simple impact: weight by (value - approximate mean) for this sample
-    sample = X[0]
+    sample = inference.X[0]
     top_idx = np.argsort(importances)[::-1][:3]
     top_contributing = []
     for i in top_idx:
         name = feature_names[i]
         val = float(sample[i])
-        imp = float(importances[i])
         impact = "increases" if val > 0.5 else "decreases"
         top_contributing.append({"name": name, "value": val, "impact": f"{impact} risk"})
 
     return {
-        "risk_level": pred,
+        "risk_level": inference.risk_level,
         "confidence_score": round(confidence, 1),
         "probability_breakdown": prob_dict,
         "top_contributing_features": top_contributing,
-        "model": model,
         "meta": meta,
+        "inference": inference,
     }
 
 
+def shap_values_batch(bundle: ModelBundle, X: np.ndarray, class_indices) -> np.ndarray:
+    """
+    SHAP values for many rows in one explainer call, using the bundle's cached TreeExplainer.
+    Returns an (n_rows, n_features) array with each row's values for its own class index.
+    """
+    shap_vals = bundle.explainer().shap_values(X)
+    rows = np.arange(len(X))
+    class_indices = np.asarray(class_indices)
+    # For multiclass, shap_vals is list of arrays (one per class); newer shap returns (n, features, classes)
+    if isinstance(shap_vals, list):
+        return np.stack(shap_vals)[class_indices, rows]
+    if shap_vals.ndim == 3:
+        return shap_vals[rows, :, class_indices]
+    return shap_vals
+
+
+def shap_contributions_batch(
+    bundle: ModelBundle, X: np.ndarray, class_indices, top_k: int = SHAP_TOP_K
+) -> list[list[dict] | None]:
+    """
+    Top-k SHAP contributions per row, e.g. for cohort views and bulk rescoring.
+    Returns [None] * n when SHAP is unavailable or fails (explanations are best-effort).
+    """
+    if not _SHAP_AVAILABLE or len(X) == 0:
+        return [None] * len(X)
+    try:
+        values = shap_values_batch(bundle, X, class_indices)
+    except Exception:
+        return [None] * len(X)
+    feature_names = bundle.meta["feature_names"]
+    out = []
+    for sv in values:
+        order = np.argsort(-np.abs(sv), kind="stable")[:top_k]
+        out.append([{"name": feature_names[i], "contribution": float(sv[i])} for i in order])
+    return out
+
+
+def explain_inferences(inferences: list[TriageInference], top_k: int = SHAP_TOP_K) -> list[list[dict] | None]:
+    """
+    Batched SHAP for TriageInference results (grouped per model version, one call per group).
+    Rows whose contributions are already in prediction_cache are not explained again.
+    """
+    out: list[list[dict] | None] = [None] * len(inferences)
+    use_cache = _SHAP_AVAILABLE and top_k == SHAP_TOP_K
+    groups: dict[int, list[int]] = {}
+    for i, inf in enumerate(inferences):
+        if use_cache and inf.cache_key is not None:
+            out[i] = prediction_cache.get_shap(inf.cache_key)
+            if out[i] is not None:
+                continue
+        groups.setdefault(id(inf.bundle), []).append(i)
+    for idx in groups.values():
+        bundle = inferences[idx[0]].bundle
+        X = np.vstack([inferences[i].X for i in idx])
+        classes = [inferences[i].predicted_index for i in idx]
+        for i, contribs in zip(idx, shap_contributions_batch(bundle, X, classes, top_k)):
+            out[i] = contribs
+            if use_cache and contribs is not None and inferences[i].cache_key is not None:
+                prediction_cache.put_shap(inferences[i].cache_key, contribs)
+    return out
+
+
 def get_explainability(
     age: int,
     gender: str,
@@ -107,23 +270,30 @@ def get_explainability(
     symptoms: list[str],
     risk_level: str,
     recommended_department: str,
+    inference: TriageInference | None = None,
+    shap_contributions: list[dict] | None = None,
 ) -> dict:
-    """Build explainability: top 3 features, abnormal vitals, department reasoning."""
-    _, _, meta = _load_artifacts()
-    pred_result = predict_risk(
-        age=age,
-        gender=gender,
-        heart_rate=heart_rate,
-        blood_pressure_systolic=blood_pressure_systolic,
-        blood_pressure_diastolic=blood_pressure_diastolic,
-        temperature=temperature,
-        spo2=spo2,
-        chronic_disease_count=chronic_disease_count,
-        respiratory_rate=respiratory_rate,
-        pain_score=pain_score,
-        symptom_duration=symptom_duration,
-        symptoms=symptoms,
-    )
+    """
+    Build explainability: top 3 features, abnormal vitals, department reasoning.
+    Pass the TriageInference from predict_risk to reuse its scaled vector and model version,
+    and shap_contributions when they were already computed in a batch.
+    """
+    if inference is None:
+        inference = infer(
+            age=age,
+            gender=gender,
+            heart_rate=heart_rate,
+            blood_pressure_systolic=blood_pressure_systolic,
+            blood_pressure_diastolic=blood_pressure_diastolic,
+            temperature=temperature,
+            spo2=spo2,
+            chronic_disease_count=chronic_disease_count,
+            respiratory_rate=respiratory_rate,
+            pain_score=pain_score,
+            symptom_duration=symptom_duration,
+            symptoms=symptoms,
+        )
+    pred_result = summarize_inference(inference)
     top_contributing = pred_result["top_contributing_features"]
 
     abnormal_vitals: list[dict] = []
@@ -143,41 +313,21 @@ def get_explainability(
     dept_reasoning = f"Risk level '{risk_level}' from ML model; department '{recommended_department}' selected by rule mapping based on risk and symptoms (e.g. cardiac → Cardiology, neuro → Neurology, critical → Emergency)."
 
     # SHAP contributions and feature importance (if available)
-    shap_contributions = None
     feature_importance_list = None
     if _SHAP_AVAILABLE:
-        try:
-            model, scaler, meta = _load_artifacts()
-            X = preprocess_single(
-                age=age, gender=gender, heart_rate=heart_rate,
-                blood_pressure_systolic=blood_pressure_systolic,
-                blood_pressure_diastolic=blood_pressure_diastolic,
-                temperature=temperature, spo2=spo2, 
-                chronic_disease_count=chronic_disease_count,
-                respiratory_rate=respiratory_rate,
-                pain_score=pain_score,
-                symptom_duration=symptom_duration,
-                symptoms=symptoms, scaler=scaler,
-            )
-            explainer = shap.TreeExplainer(model, feature_perturbation="interventional")
-            shap_vals = explainer.shap_values(X)
-            feature_names = meta["feature_names"]
-            # For multiclass, shap_vals is list of arrays (one per class); use predicted class
-            pred_idx = list(model.classes_).index(risk_level) if risk_level in model.classes_ else 0
-            if isinstance(shap_vals, list):
-                sv = shap_vals[pred_idx][0]
+        if shap_contributions is None:
+            pred_idx = inference.classes.index(risk_level) if risk_level in inference.classes else 0
+            if pred_idx == inference.predicted_index:
+                shap_contributions = explain_inferences([inference])[0]
             else:
-                sv = shap_vals[0]
-            contribs = [{"name": feature_names[i], "contribution": float(sv[i])} for i in range(len(sv))]
-            contribs.sort(key=lambda x: abs(x["contribution"]), reverse=True)
-            shap_contributions = contribs[:10]
+                shap_contributions = shap_contributions_batch(inference.bundle, inference.X, [pred_idx])[0]
+        if shap_contributions is not None:
             # Global feature importance from model
+            importances, feature_names = inference.bundle.feature_importances, inference.bundle.meta["feature_names"]
             feature_importance_list = [
-                {"name": feature_names[i], "importance": float(model.feature_importances_[i])}
-                for i in np.argsort(model.feature_importances_)[::-1][:10]
+                {"name": feature_names[i], "importance": float(importances[i])}
+                for i in np.argsort(importances)[::-1][:10]
             ]
-        except Exception:
-            pass
 
     return {
         "top_contributing_features": top_contributing,
@@ -186,3 +336,40 @@ def get_explainability(
         "shap_contributions": shap_contributions,
         "feature_importance": feature_importance_list,
     }
+
+
+def warm_up(bundle: ModelBundle | None = None) -> dict:
+    """
+    Do everything the first admission would otherwise pay for: load the artifacts, prepare the
+    compiled forest, build the SHAP explainer and run single-row and batch scoring and SHAP once
+    (which also JIT-compiles the Numba kernel for these array layouts). Bypasses prediction_cache.
+    Returns the milliseconds spent per step; the SHAP steps are "skipped" when shap is not installed.
+    """
+    timings = {}
+
+    def step(name, fn):
+        t0 = time.perf_counter()
+        result = fn()
+        timings[name] = round(1000 * (time.perf_counter() - t0), 1)
+        return result
+
+    bundle = bundle or step("load_artifacts", get_bundle)
+    step("compiled_forest", lambda: (bundle.forest(), bundle.classes, bundle.feature_importances))
+    if _SHAP_AVAILABLE:
+        step("explainer", bundle.explainer)
+    else:
+        timings["explainer"] = "skipped"  # Scoring works without shap; explanations just omit SHAP
+
+    def score():
+        raw_one = np.array([raw_feature_row(**_WARMUP_PATIENT)], dtype=np.float64)
+        raw_batch = raw_feature_matrix(patients_to_columns([_WARMUP_PATIENT] * 2))
+        _predict_proba(bundle, raw_batch, bundle.scale(raw_batch))
+        return bundle.scale(raw_one), _predict_proba(bundle, raw_one, bundle.scale(raw_one))
+
+    X, probs = step("predict", score)
+    if _SHAP_AVAILABLE:
+        step("explain", lambda: shap_contributions_batch(bundle, X, [int(np.argmax(probs[0]))]))
+    else:
+        timings["explain"] = "skipped"
+    return timings
+
@@ -0,0 +1,83 @@
+"""Training rows from triaged PatientRecord history, streamed from the database in chunks."""
+
+import os
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import create_engine, select
+from sqlalchemy.engine import make_url
+
+from app.database import SQLALCHEMY_DATABASE_URL, PatientRecord
+from ml.preprocessing import NUMERIC_FEATURES, SYMPTOM_COLUMNS, encode_symptoms_batch
+
+HISTORY_CHUNK_ROWS = int(os.getenv("HISTORY_CHUNK_ROWS", "5000"))
+RISK_LEVELS = ("low", "medium", "high")
+
+
+def sync_database_url(url: str = SQLALCHEMY_DATABASE_URL) -> str:
+    """The app's async URL with the dialect's default sync driver (training runs outside the event loop)."""
+    parsed = make_url(url)
+    return parsed.set(drivername=parsed.get_backend_name()).render_as_string(hide_password=False)
+
+
+def _chunk_frame(rows) -> pd.DataFrame:
+    """One fetched chunk in the generate_synthetic_data layout, plus id and created_at."""
+    df = pd.DataFrame(rows, columns=list(rows[0]._fields))
+    multi_hot = encode_symptoms_batch([s or [] for s in df["symptoms"]])
+    frame = {
+        "id": df["id"].to_numpy(),
+        "created_at": pd.to_datetime(df["created_at"]),
+        **{col: df[col].to_numpy(dtype=np.float64) for col in NUMERIC_FEATURES},
+        "gender": df["gender"].to_numpy(dtype=str),
+        "risk": df["risk_level"].to_numpy(dtype=str),
+    }
+    frame.update({col: multi_hot[:, j] for j, col in enumerate(SYMPTOM_COLUMNS)})
+    return pd.DataFrame(frame)
+
+
+def iter_history_chunks(
+    after_id: int = 0, chunk_rows: int = HISTORY_CHUNK_ROWS, database_url: str | None = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Labelled patient rows with id > after_id, in id order, one DataFrame per chunk_rows. Uses a
+    server-side cursor where the driver has one, so memory is bounded by a chunk, not the table.
+    Rows admitted before symptoms were stored (symptoms NULL) or with an unknown risk level are
+    skipped: zero-filled symptoms would teach the model that those patients had none.
+    """
+    engine = create_engine(database_url or sync_database_url())
+    columns = [getattr(PatientRecord, c) for c in ("id", "created_at", *NUMERIC_FEATURES, "gender", "risk_level", "symptoms")]
+    stmt = (
+        select(*columns)
+        .where(PatientRecord.id > after_id)
+        .where(PatientRecord.symptoms.is_not(None))
+        .where(PatientRecord.risk_level.in_(RISK_LEVELS))
+        .order_by(PatientRecord.id)
+    )
+    try:
+        with engine.connect() as conn:
+            result = conn.execution_options(stream_results=True, yield_per=chunk_rows).execute(stmt)
+            for rows in result.partitions():
+                yield _chunk_frame(rows)
+    finally:
+        engine.dispose()
+
+
+def load_history(after_id: int = 0, chunk_rows: int = HISTORY_CHUNK_ROWS, database_url: str | None = None) -> pd.DataFrame:
+    """All history rows newer than after_id as one frame (empty frame with the right columns if none)."""
+    chunks = list(iter_history_chunks(after_id, chunk_rows, database_url))
+    if not chunks:
+        return pd.DataFrame(columns=["id", "created_at", *NUMERIC_FEATURES, "gender", "risk", *SYMPTOM_COLUMNS])
+    return pd.concat(chunks, ignore_index=True)
+
+
+def checkpoint(history: pd.DataFrame, previous: dict | None = None) -> dict:
+    """Where the next incremental refresh starts: the highest id seen so far."""
+    previous = previous or {}
+    if history.empty:
+        return {**previous, "rows_used": 0}
+    return {
+        "last_id": int(history["id"].max()),
+        "last_created_at": history["created_at"].max().isoformat(),
+        "rows_used": int(len(history)),
+    }
@@ -0,0 +1,114 @@
+"""Bounded LRU cache of model outputs keyed by (model version, quantized raw feature vector)."""
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+
+import numpy as np
+
+from ml.registry import registry
+
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "4096"))  # 0 disables the cache
+# Raw features are rounded to this many decimals before keying, so float noise
+# (37.300000000000004 vs 37.3, -0.0 vs 0.0) still hits. Intake vitals carry at most one decimal.
+PREDICTION_CACHE_DECIMALS = int(os.getenv("PREDICTION_CACHE_DECIMALS", "6"))
+
+
+@dataclass(frozen=True)
+class CachedPrediction:
+    probabilities: np.ndarray  # Read-only copy, class order of the model version in the key
+    shap_contributions: list[dict] | None = None  # Filled in once SHAP has run for the row
+
+
+class PredictionCache:
+    """Thread-safe LRU; entries are immutable and replaced whole, so readers never see partial updates."""
+
+    def __init__(self, maxsize: int = PREDICTION_CACHE_SIZE, decimals: int = PREDICTION_CACHE_DECIMALS):
+        self.maxsize = maxsize
+        self.decimals = decimals
+        self._entries: OrderedDict[tuple, CachedPrediction] = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._shap_hits = 0
+        self._shap_misses = 0
+        self._evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0
+
+    def keys(self, version: str, X_raw: np.ndarray) -> list[tuple]:
+        """One key per row of the raw feature matrix (adding 0.0 turns -0.0 into 0.0)."""
+        rows = np.round(np.asarray(X_raw, dtype=np.float64), self.decimals) + 0.0
+        return [(version, row.tobytes()) for row in rows]
+
+    def get(self, key: tuple) -> CachedPrediction | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def put(self, key: tuple, probabilities: np.ndarray) -> CachedPrediction:
+        probabilities = np.array(probabilities, dtype=np.float64)
+        probabilities.flags.writeable = False
+        entry = CachedPrediction(probabilities=probabilities)
+        self._store(key, entry)
+        return entry
+
+    def get_shap(self, key: tuple) -> list[dict] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            contribs = entry.shap_contributions if entry is not None else None
+            if contribs is None:
+                self._shap_misses += 1
+            else:
+                self._shap_hits += 1
+            return contribs
+
+    def put_shap(self, key: tuple, contributions: list[dict]) -> None:
+        """Attach SHAP contributions to a cached row (no-op if it was evicted meanwhile)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = replace(entry, shap_contributions=contributions)
+
+    def _store(self, key: tuple, entry: CachedPrediction) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self, *_) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self) -> dict:
+        with self._lock:
+            hits, misses = self._hits, self._misses
+            shap_hits, shap_misses = self._shap_hits, self._shap_misses
+            size, evictions = len(self._entries), self._evictions
+        return {
+            "maxsize": self.maxsize,
+            "size": size,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+            "shap_hits": shap_hits,
+            "shap_misses": shap_misses,
+            "evictions": evictions,
+        }
+
+
+prediction_cache = PredictionCache()
+# Entries of the outgoing version can never be hit again once a new model is live
+registry.add_swap_listener(prediction_cache.clear)
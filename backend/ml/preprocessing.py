@@ -1,7 +1,12 @@
 """Preprocessing pipeline: encoding + scaling for triage features."""
 
+from itertools import chain
+from typing import TYPE_CHECKING, Any, Mapping
+
 import numpy as np
-from sklearn.preprocessing import StandardScaler
+
+if TYPE_CHECKING:
+    from sklearn.preprocessing import StandardScaler  # Annotations only; scaling needs just mean_/scale_
 
 from app.schemas import SYMPTOM_OPTIONS
 
@@ -19,13 +24,19 @@ ALL_FEATURES = [
     "respiratory_rate", "pain_score", "symptom_duration"
 ] + SYMPTOM_COLUMNS
 
+# Precomputed lookups for batch encoding
+SYMPTOM_INDEX = {s: i for i, s in enumerate(SYMPTOM_OPTIONS)}
+_SYMPTOM_NAMES_SORTED = np.array(sorted(SYMPTOM_OPTIONS))
+_SYMPTOM_SORTED_TO_COLUMN = np.array([SYMPTOM_INDEX[s] for s in _SYMPTOM_NAMES_SORTED])
+_FIRST_SYMPTOM_COL = ALL_FEATURES.index(SYMPTOM_COLUMNS[0])
+
 
 def encode_symptoms(symptoms: list[str]) -> dict[str, int]:
     """Encode symptoms to binary columns."""
     return {f"symptom_{s}": 1 if s in symptoms else 0 for s in SYMPTOM_OPTIONS}
 
 
-def preprocess_single(
+def raw_feature_row(
     age: int,
     gender: str,
     heart_rate: int,
@@ -38,9 +49,8 @@ def preprocess_single(
     pain_score: int,
     symptom_duration: int,
     symptoms: list[str],
-    scaler: StandardScaler,
-) -> np.ndarray:
-    """Convert single patient dict to scaled feature vector for prediction."""
+) -> list[float]:
+    """Unscaled feature values for one patient, in ALL_FEATURES order."""
     gender_enc = GENDER_MAP.get(gender, 2)
     symptom_enc = encode_symptoms(symptoms)
     row = {
@@ -58,9 +68,107 @@ def preprocess_single(
         **symptom_enc,
     }
     # Ensure column order
-    arr = np.array([[row[k] for k in ALL_FEATURES]], dtype=np.float64)
+    return [row[k] for k in ALL_FEATURES]
+
+
+def preprocess_single(
+    age: int,
+    gender: str,
+    heart_rate: int,
+    blood_pressure_systolic: int,
+    blood_pressure_diastolic: int,
+    temperature: float,
+    spo2: int,
+    chronic_disease_count: int,
+    respiratory_rate: int,
+    pain_score: int,
+    symptom_duration: int,
+    symptoms: list[str],
+    scaler: "StandardScaler",
+) -> np.ndarray:
+    """Convert single patient dict to scaled feature vector for prediction."""
+    row = raw_feature_row(
+        age=age,
+        gender=gender,
+        heart_rate=heart_rate,
+        blood_pressure_systolic=blood_pressure_systolic,
+        blood_pressure_diastolic=blood_pressure_diastolic,
+        temperature=temperature,
+        spo2=spo2,
+        chronic_disease_count=chronic_disease_count,
+        respiratory_rate=respiratory_rate,
+        pain_score=pain_score,
+        symptom_duration=symptom_duration,
+        symptoms=symptoms,
+    )
+    arr = np.array([row], dtype=np.float64)
     return scaler.transform(arr)
 
 
+def encode_symptoms_batch(symptom_lists) -> np.ndarray:
+    """Multi-hot (n, len(SYMPTOM_OPTIONS)) int8 matrix from a sequence of symptom lists."""
+    n = len(symptom_lists)
+    out = np.zeros((n, len(SYMPTOM_OPTIONS)), dtype=np.int8)
+    lengths = np.fromiter((len(s) for s in symptom_lists), dtype=np.int64, count=n)
+    if lengths.sum() == 0:
+        return out
+    flat = np.array(list(chain.from_iterable(symptom_lists)), dtype=_SYMPTOM_NAMES_SORTED.dtype)
+    pos = np.searchsorted(_SYMPTOM_NAMES_SORTED, flat).clip(0, len(_SYMPTOM_NAMES_SORTED) - 1)
+    known = _SYMPTOM_NAMES_SORTED[pos] == flat  # Unknown symptoms are ignored, as in encode_symptoms
+    rows = np.repeat(np.arange(n), lengths)
+    out[rows[known], _SYMPTOM_SORTED_TO_COLUMN[pos[known]]] = 1
+    return out
+
+
+def encode_gender_batch(genders) -> np.ndarray:
+    """Vectorized GENDER_MAP lookup; unknown values encode as 2 like preprocess_single."""
+    genders = np.asarray(genders)
+    out = np.full(len(genders), 2, dtype=np.float64)
+    for name, code in GENDER_MAP.items():
+        out[genders == name] = code
+    return out
+
+
+def raw_feature_matrix(columns: Mapping[str, Any]) -> np.ndarray:
+    """
+    Unscaled (n, len(ALL_FEATURES)) float64 matrix from columnar inputs.
+
+    `columns` is a DataFrame or dict of arrays with NUMERIC_FEATURES plus either "gender" or
+    "gender_enc", and either the symptom_* 0/1 columns (the frame build_features consumes)
+    or a "symptoms" column of symptom lists.
+    """
+    numeric = {k: np.asarray(columns[k], dtype=np.float64) for k in NUMERIC_FEATURES}
+    n = len(numeric["age"])
+    X = np.empty((n, len(ALL_FEATURES)), dtype=np.float64)
+    for k, col in numeric.items():
+        X[:, ALL_FEATURES.index(k)] = col
+    if "gender_enc" in columns:
+        X[:, ALL_FEATURES.index("gender_enc")] = np.asarray(columns["gender_enc"], dtype=np.float64)
+    else:
+        X[:, ALL_FEATURES.index("gender_enc")] = encode_gender_batch(columns["gender"])
+    if SYMPTOM_COLUMNS[0] in columns:
+        for j, c in enumerate(SYMPTOM_COLUMNS):
+            X[:, _FIRST_SYMPTOM_COL + j] = np.asarray(columns[c], dtype=np.float64) if c in columns else 0.0
+    else:
+        X[:, _FIRST_SYMPTOM_COL:] = encode_symptoms_batch(columns["symptoms"])
+    return X
+
+
+def scale_features(X: np.ndarray, scaler: "StandardScaler") -> np.ndarray:
+    """Same arithmetic as scaler.transform, without sklearn's per-call input validation."""
+    return (X - scaler.mean_) / scaler.scale_
+
+
+def preprocess_batch(columns: Mapping[str, Any], scaler: "StandardScaler") -> np.ndarray:
+    """Scaled feature matrix for many patients using array operations only (see raw_feature_matrix)."""
+    return scale_features(raw_feature_matrix(columns), scaler)
+
+
+def patients_to_columns(patients: list[dict]) -> dict[str, list]:
+    """Transpose predict_risk-style patient dicts into the columnar input of preprocess_batch."""
+    keys = NUMERIC_FEATURES + ["gender", "symptoms"]
+    return {k: [p[k] for p in patients] for k in keys}
+
+
 def get_feature_names() -> list[str]:
     return list(ALL_FEATURES)
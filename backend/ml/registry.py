@@ -0,0 +1,260 @@
+"""Process-wide model registry: load artifacts once, serve from memory, hot-swap on retrain."""
+
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import joblib
+
+from ml.artifact_store import MODEL_DIR, ArtifactStore, artifact_store
+from ml.compiled_forest import COMPILED_FOREST_DIR, CompiledForest
+
+# How often current() stats the version pointer for changes made by another process (0 disables)
+MODEL_POINTER_CHECK_SECONDS = float(os.getenv("MODEL_POINTER_CHECK_SECONDS", "2"))
+
+
+@dataclass(frozen=True)
+class ModelBundle:
+    """Immutable snapshot of one model version. Requests hold on to the bundle they started with."""
+
+    model: Any  # None when serving from a compiled export; see estimator()
+    scaler: Any  # None when the exported forest has the scaler folded in
+    meta: dict
+    compiled: CompiledForest | None = None  # Exported by train(); compiled from `model` if missing
+    model_path: Path | None = None  # risk_model.joblib, unpickled on first estimator() call
+    # Objects derived from this model version (e.g. the SHAP explainer), built on first use
+    _derived: dict = field(default_factory=dict, init=False, repr=False, compare=False)
+
+    @property
+    def version(self) -> str:
+        return str(self.meta.get("version", "unknown"))
+
+    @property
+    def classes(self) -> list[str]:
+        classes = self._derived.get("classes")
+        if classes is None:
+            classes = self._derived.setdefault("classes", [str(c) for c in self.forest().classes])
+        return classes
+
+    @property
+    def feature_importances(self):
+        """model.feature_importances_ recomputes over every tree on each access; cache it per version."""
+        importances = self._derived.get("feature_importances")
+        if importances is None:
+            importances = self.forest().feature_importances
+            if importances is None:
+                importances = self.estimator().feature_importances_
+            importances = self._derived.setdefault("feature_importances", importances)
+        return importances
+
+    def estimator(self):
+        """
+        The sklearn forest. Bundles loaded from a compiled export serve predictions and SHAP from
+        the memory-mapped arrays and only unpickle the model if something needs it (large batches).
+        """
+        if self.model is not None:
+            return self.model
+        model = self._derived.get("model")
+        if model is None:
+            with _DERIVED_LOCK:
+                model = self._derived.get("model")
+                if model is None:
+                    model = self._derived["model"] = joblib.load(self.model_path)
+        return model
+
+    def forest(self) -> CompiledForest:
+        """Flat-array evaluator on raw (unscaled) features for this model version."""
+        if self.compiled is not None:
+            return self.compiled
+        forest = self._derived.get("forest")
+        if forest is None:
+            with _DERIVED_LOCK:
+                forest = self._derived.get("forest")
+                if forest is None:
+                    forest = CompiledForest.from_sklearn(self.estimator(), self.version).fold_scaler(self.scaler)
+                    self._derived["forest"] = forest
+        return forest
+
+    def scale(self, X_raw):
+        """Scaled feature matrix (what the sklearn model and SHAP expect) from raw features."""
+        return self.forest().scale(X_raw)
+
+    def explainer(self):
+        """SHAP TreeExplainer for this model version; built once and reused by every request."""
+        explainer = self._derived.get("explainer")
+        if explainer is None:
+            with _DERIVED_LOCK:
+                explainer = self._derived.get("explainer")
+                if explainer is None:
+                    import shap
+                    forest = self.forest()
+                    source = forest.shap_model() if forest.node_weight is not None else self.estimator()
+                    explainer = shap.TreeExplainer(source, feature_perturbation="interventional")
+                    self._derived["explainer"] = explainer
+        return explainer
+
+
+_DERIVED_LOCK = threading.Lock()
+
+
+def load_bundle(model_dir: Path | None = None) -> ModelBundle:
+    """
+    Read meta.json (from the live version in the artifact store unless model_dir is given) and memory-map the compiled forest (raises FileNotFoundError if not trained).
+    With an up-to-date export neither risk_model.joblib nor scaler.joblib is unpickled here,
+    so extra uvicorn workers share the export's pages instead of each holding a model copy.
+    """
+    model_dir = model_dir or artifact_store.current_dir()
+    model_path = model_dir / "risk_model.joblib"
+    if not model_path.exists():
+        raise FileNotFoundError(model_path)
+    with open(model_dir / "meta.json") as f:
+        meta = json.load(f)
+    compiled = None
+    if (model_dir / COMPILED_FOREST_DIR / "forest.json").exists():
+        compiled = CompiledForest.load(model_dir / COMPILED_FOREST_DIR)
+        if compiled.version != str(meta.get("version")) or not compiled.raw_input or compiled.node_weight is None:
+            compiled = None  # Stale or incomplete export; recompile from the model instead
+    if compiled is not None:
+        return ModelBundle(model=None, scaler=None, meta=meta, compiled=compiled, model_path=model_path)
+    return ModelBundle(
+        model=joblib.load(model_path),
+        scaler=joblib.load(model_dir / "scaler.joblib"),
+        meta=meta,
+        compiled=None,
+        model_path=model_path,
+    )
+
+
+class ModelRegistry:
+    """
+    Holds the live ModelBundle. Readers take a reference without locking; a swap replaces
+    the reference in one assignment, so in-flight requests keep the version they captured.
+    Versions promoted by another process (another uvicorn worker, the CLI) are picked up by
+    current() at most check_interval seconds later: one stat of the store pointer, and on a
+    change a background thread loads and warms the new version before swapping it in.
+    """
+
+    def __init__(self, store: ArtifactStore = artifact_store, check_interval: float = MODEL_POINTER_CHECK_SECONDS):
+        self.store = store
+        self.check_interval = check_interval
+        self._bundle: ModelBundle | None = None
+        self._stamp: tuple | None = None  # Pointer stamp the live bundle was resolved from
+        self._next_check = 0.0
+        self._following = False
+        self._lock = threading.Lock()
+        self._swap_listeners = []
+
+    @property
+    def loaded(self) -> bool:
+        return self._bundle is not None
+
+    def current(self) -> ModelBundle:
+        """Return the live bundle, loading it from disk on first use."""
+        bundle = self._bundle
+        if bundle is not None:
+            if self.check_interval > 0 and time.monotonic() >= self._next_check:
+                self._check_pointer()
+            return bundle
+        with self._lock:
+            if self._bundle is None:
+                self._stamp = self.store.stamp()  # Before resolving, so a concurrent promote is seen next check
+                self._bundle = load_bundle(self.store.current_dir())
+                self._next_check = time.monotonic() + self.check_interval
+            return self._bundle
+
+    def _check_pointer(self) -> None:
+        self._next_check = time.monotonic() + self.check_interval
+        stamp = self.store.stamp()
+        with self._lock:
+            if stamp == self._stamp or self._following:
+                return
+            self._following = True
+        threading.Thread(target=self._follow, args=(stamp,), name="model-pointer", daemon=True).start()
+
+    def _follow(self, stamp: tuple | None) -> None:
+        try:
+            bundle = self._prepare(self.store.current_dir())
+            self.swap(bundle, stamp)
+            print(f"Model pointer changed; now serving {bundle.version}")
+        except Exception as e:
+            self._stamp = stamp  # Retried on the next pointer change, not on every request
+            print(f"Model pointer changed but the new version was not loaded: {e!r}")
+        finally:
+            self._following = False
+
+    @staticmethod
+    def _prepare(model_dir: Path) -> ModelBundle:
+        from ml.inference import warm_up
+        bundle = load_bundle(model_dir)
+        warm_up(bundle)  # Explainer and JIT ready before the new version takes traffic
+        return bundle
+
+    def add_swap_listener(self, callback) -> None:
+        """Call callback(new_bundle, previous_bundle) after every swap (e.g. to drop cached outputs)."""
+        self._swap_listeners.append(callback)
+
+    def swap(self, bundle: ModelBundle, stamp: tuple | None = None) -> ModelBundle:
+        """Atomically publish a new bundle; returns the previous one (or None)."""
+        with self._lock:
+            previous, self._bundle = self._bundle, bundle
+            if stamp is not None:
+                self._stamp = stamp
+        for callback in self._swap_listeners:
+            callback(bundle, previous)
+        return previous
+
+    def reload(self) -> ModelBundle:
+        """Load the live version from disk (outside the lock) and swap it in."""
+        stamp = self.store.stamp()
+        bundle = load_bundle(self.store.current_dir())
+        self.swap(bundle, stamp)
+        return bundle
+
+    def _activate(self, version: str, flip) -> ModelBundle | None:
+        """
+        Warm version (if this process serves a model), run flip() to move the store pointer, then
+        swap. The bundle is ready before the pointer changes, so this process never serves a cold one.
+        """
+        bundle = self._prepare(self.store.version_dir(version)) if self.loaded else None
+        with self._lock:
+            self._following = True  # Our own pointer change is not a change to follow
+        try:
+            flip()
+            if bundle is not None:
+                self.swap(bundle, self.store.stamp())
+            else:
+                self._stamp = self.store.stamp()
+        finally:
+            self._following = False
+        return bundle
+
+    def publish(self, source_dir: Path, move: bool = False) -> str:
+        """Add a trained model directory to the store as a new version and make it live; returns the version."""
+        version = self.store.add(source_dir, move=move)
+        self._activate(version, lambda: self.store.promote(version))
+        return version
+
+    def promote(self, version: str) -> ModelBundle | None:
+        """Make a stored version live (LookupError if unknown)."""
+        return self._activate(version, lambda: self.store.promote(version))
+
+    def rollback(self) -> str:
+        """
+        Make the previously promoted version live again; returns it. Raises LookupError if there is
+        none, StaleRollbackError if another process moved the pointer while it was being warmed.
+        """
+        version = self.store.rollback_target()
+        # The store re-checks the target under its lock, so the pointer only moves to what was warmed
+        self._activate(version, lambda: self.store.rollback(expected=version))
+        return version
+
+
+registry = ModelRegistry()
+
+
+def get_bundle() -> ModelBundle:
+    return registry.current()
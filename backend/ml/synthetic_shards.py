@@ -0,0 +1,144 @@
+"""Streaming synthetic dataset generation into partitioned columnar shards (.npz, or Parquet with pyarrow)."""
+
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+from ml.train_model import DATA_DIR, generate_synthetic_data
+
+SHARDS_DIR = DATA_DIR / "shards"
+MANIFEST = "manifest.json"
+DEFAULT_CHUNK_ROWS = 250_000  # ~190 MB peak per chunk being generated
+SHARD_FORMATS = ("npz", "parquet")
+_PARQUET_AVAILABLE = find_spec("pyarrow") is not None
+
+
+def chunk_plan(n_rows: int, chunk_rows: int, seed: int) -> list[tuple[int, int, np.random.SeedSequence]]:
+    """
+    (shard index, rows, seed) per chunk. Seeds are spawned from one SeedSequence, so chunks are
+    statistically independent and the dataset depends only on (n_rows, chunk_rows, seed), not on
+    how many processes generate it or in which order.
+    """
+    sizes = [chunk_rows] * (n_rows // chunk_rows) + ([n_rows % chunk_rows] if n_rows % chunk_rows else [])
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    return [(i, size, s) for i, (size, s) in enumerate(zip(sizes, seeds))]
+
+
+def iter_synthetic_chunks(
+    n_rows: int, chunk_rows: int = DEFAULT_CHUNK_ROWS, seed: int = 42
+) -> Iterator[pd.DataFrame]:
+    """Yield the dataset chunk by chunk; memory stays bounded by one chunk."""
+    for _, size, chunk_seed in chunk_plan(n_rows, chunk_rows, seed):
+        yield generate_synthetic_data(size, seed=chunk_seed)
+
+
+def _shard_path(out_dir: Path, index: int, fmt: str) -> Path:
+    return out_dir / f"part-{index:05d}.{fmt}"
+
+
+def _write_shard(out_dir: Path, index: int, size: int, chunk_seed: np.random.SeedSequence, fmt: str) -> int:
+    df = generate_synthetic_data(size, seed=chunk_seed)
+    path = _shard_path(out_dir, index, fmt)
+    if fmt == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        # Plain arrays only (strings as fixed-width unicode), so reading never needs pickle
+        np.savez(path, **{col: df[col].to_numpy(dtype=str if df[col].dtype == object else None) for col in df})
+    return len(df)
+
+
+def write_shards(
+    out_dir: Path = SHARDS_DIR,
+    n_rows: int = 1_000_000,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    seed: int = 42,
+    workers: int = 1,
+    fmt: str = "npz",
+) -> dict:
+    """
+    Generate n_rows into out_dir as one shard per chunk plus manifest.json. With workers > 1 chunks
+    are generated and written by a process pool (at most `workers` chunks in memory at once).
+    Shards go to a temporary directory that replaces out_dir only once every shard is written.
+    """
+    if fmt not in SHARD_FORMATS:
+        raise ValueError(f"Unknown shard format {fmt!r}; expected one of {SHARD_FORMATS}")
+    if fmt == "parquet" and not _PARQUET_AVAILABLE:
+        raise RuntimeError("Parquet shards need pyarrow; install it or use fmt='npz'")
+    out_dir = Path(out_dir)
+    tmp_dir = out_dir.with_name(out_dir.name + ".tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    plan = chunk_plan(n_rows, chunk_rows, seed)
+    started = time.perf_counter()
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_write_shard, tmp_dir, i, size, s, fmt) for i, size, s in plan]
+            rows = [f.result() for f in futures]
+    else:
+        rows = [_write_shard(tmp_dir, i, size, s, fmt) for i, size, s in plan]
+
+    manifest = {
+        "format": fmt,
+        "seed": seed,
+        "chunk_rows": chunk_rows,
+        "requested_rows": n_rows,
+        # Resampling to the 60/30/10 class mix can drop a row or two per chunk
+        "total_rows": int(sum(rows)),
+        "shards": [{"file": _shard_path(tmp_dir, i, fmt).name, "rows": r} for (i, _, _), r in zip(plan, rows)],
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "generation_seconds": round(time.perf_counter() - started, 3),
+    }
+    with open(tmp_dir / MANIFEST, "w") as f:
+        json.dump(manifest, f, indent=2)
+    shutil.rmtree(out_dir, ignore_errors=True)
+    os.replace(tmp_dir, out_dir)
+    return manifest
+
+
+def read_manifest(shards_dir: Path = SHARDS_DIR) -> dict:
+    with open(Path(shards_dir) / MANIFEST) as f:
+        return json.load(f)
+
+
+def iter_shards(shards_dir: Path = SHARDS_DIR, columns: list[str] | None = None) -> Iterator[pd.DataFrame]:
+    """Read shards back one DataFrame at a time (optionally only some columns)."""
+    shards_dir = Path(shards_dir)
+    manifest = read_manifest(shards_dir)
+    for shard in manifest["shards"]:
+        path = shards_dir / shard["file"]
+        if manifest["format"] == "parquet":
+            yield pd.read_parquet(path, columns=columns)
+        else:
+            with np.load(path, allow_pickle=False) as npz:
+                yield pd.DataFrame({col: npz[col] for col in (columns or npz.files)})
+
+
+def load_shards(shards_dir: Path = SHARDS_DIR, columns: list[str] | None = None) -> pd.DataFrame:
+    """The whole sharded dataset as one DataFrame (needs memory for all rows)."""
+    return pd.concat(iter_shards(shards_dir, columns), ignore_index=True)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=1, help="Processes generating chunks in parallel")
+    parser.add_argument("--format", choices=SHARD_FORMATS, default="npz")
+    parser.add_argument("--out", type=Path, default=SHARDS_DIR)
+    args = parser.parse_args()
+    manifest = write_shards(args.out, args.rows, args.chunk_rows, args.seed, args.workers, args.format)
+    print(
+        f"Wrote {manifest['total_rows']} rows in {len(manifest['shards'])} shards to {args.out} "
+        f"in {manifest['generation_seconds']} s"
+    )
@@ -4,6 +4,7 @@ import json
 import os
 from datetime import datetime
 from pathlib import Path
+from typing import Callable
 
 import numpy as np
 import pandas as pd
@@ -12,7 +13,9 @@ from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 from sklearn.utils.class_weight import compute_class_weight
 
-from ml.preprocessing import ALL_FEATURES, GENDER_MAP
+from ml.artifact_store import artifact_store
+from ml.compiled_forest import COMPILED_FOREST_DIR, CompiledForest, verify_compiled_forest
+from ml.preprocessing import ALL_FEATURES, GENDER_MAP, SYMPTOM_COLUMNS
 
 # Risk levels for classification
 RISK_LABELS = ["low", "medium", "high"]
@@ -21,24 +24,38 @@ DATA_DIR = Path(__file__).resolve().parent.parent / "data"
 MODEL_DIR.mkdir(exist_ok=True)
 DATA_DIR.mkdir(exist_ok=True)
 DATASET_PATH = DATA_DIR / "triage_dataset.csv"
+# Forest hyperparameters; python -m ml.tuning measures alternatives (accuracy vs latency)
+DEFAULT_HYPERPARAMETERS = {"n_estimators": 100, "max_depth": 12, "min_samples_leaf": 5}
+FIT_STEP_TREES = 10
+REFRESH_TREES = 20  # Trees added per incremental refresh()
+MAX_TREES = 300  # refresh() retrains from scratch rather than grow past this
+MIN_ANCHOR_ROWS = 500  # Fewest synthetic rows mixed into a refresh
 
 
-def generate_synthetic_data(n_samples: int = 2000) -> pd.DataFrame:
-    """Generate synthetic triage data with realistic ranges and controlled risk imbalance."""
-    np.random.seed(42)
+# Symptoms per row, drawn uniformly from [low, high) for each risk class
+SYMPTOM_COUNT_RANGE = {"high": (1, 5), "medium": (1, 3), "low": (0, 2)}
+
+
+def generate_synthetic_data(n_samples: int = 2000, seed: int | np.random.SeedSequence = 42) -> pd.DataFrame:
+    """
+    Generate synthetic triage data with realistic ranges and controlled risk imbalance.
+    Fully vectorized (no per-row Python), so cost grows linearly with n_samples; the same
+    seed always yields the same frame.
+    """
+    rng = np.random.default_rng(seed)
     n = n_samples
 
-    age = np.clip(np.random.normal(45, 20, n).astype(int), 1, 100)
-    gender = np.random.choice(list(GENDER_MAP.keys()), n)
-    heart_rate = np.clip(np.random.normal(80, 20, n).astype(int), 40, 180)
-    bp_sys = np.clip(np.random.normal(120, 25, n).astype(int), 80, 200)
-    bp_dia = np.clip(bp_sys * np.random.uniform(0.55, 0.75, n), 50, 120).astype(int)
-    temperature = np.clip(np.random.normal(36.8, 0.8, n), 35.0, 40.0)
-    spo2 = np.clip(np.random.normal(97, 4, n).astype(int), 75, 100)
-    chronic_disease_count = np.clip(np.random.poisson(1.5, n), 0, 10)
-    respiratory_rate = np.clip(np.random.normal(18, 5, n).astype(int), 8, 50)
-    pain_score = np.clip(np.random.normal(3, 3, n).astype(int), 0, 10)
-    symptom_duration = np.clip(np.random.exponential(24, n).astype(int), 1, 720)
+    age = np.clip(rng.normal(45, 20, n).astype(int), 1, 100)
+    gender = rng.choice(np.array(list(GENDER_MAP.keys())), n)
+    heart_rate = np.clip(rng.normal(80, 20, n).astype(int), 40, 180)
+    bp_sys = np.clip(rng.normal(120, 25, n).astype(int), 80, 200)
+    bp_dia = np.clip(bp_sys * rng.uniform(0.55, 0.75, n), 50, 120).astype(int)
+    temperature = np.clip(rng.normal(36.8, 0.8, n), 35.0, 40.0)
+    spo2 = np.clip(rng.normal(97, 4, n).astype(int), 75, 100)
+    chronic_disease_count = np.clip(rng.poisson(1.5, n), 0, 10)
+    respiratory_rate = np.clip(rng.normal(18, 5, n).astype(int), 8, 50)
+    pain_score = np.clip(rng.normal(3, 3, n).astype(int), 0, 10)
+    symptom_duration = np.clip(rng.exponential(24, n).astype(int), 1, 720)
 
     # Introduce high-risk patterns: low SpO2, very high HR, high RR, high pain, etc.
     high_risk_mask = (
@@ -46,7 +63,7 @@ def generate_synthetic_data(n_samples: int = 2000) -> pd.DataFrame:
         | (heart_rate > 120)
         | (respiratory_rate > 30)
         | (pain_score > 8)
-        | (np.random.random(n) < 0.1)
+        | (rng.random(n) < 0.1)
     )
     medium_risk_mask = (
         (spo2 < 95) & (spo2 >= 92)
@@ -54,36 +71,24 @@ def generate_synthetic_data(n_samples: int = 2000) -> pd.DataFrame:
         | (temperature > 38)
         | (respiratory_rate > 24) & (respiratory_rate <= 30)
         | (pain_score > 6) & (pain_score <= 8)
-        | (np.random.random(n) < 0.15)
+        | (rng.random(n) < 0.15)
     ) & ~high_risk_mask
-    low_risk_mask = ~high_risk_mask & ~medium_risk_mask
 
     risk = np.where(high_risk_mask, "high", np.where(medium_risk_mask, "medium", "low"))
-    # Force some imbalance: more low, fewer high
+    # Force some imbalance: resample to get ~60% low, 30% medium, 10% high
     indices = np.arange(n)
-    high_idx = indices[risk == "high"]
-    med_idx = indices[risk == "medium"]
-    low_idx = indices[risk == "low"]
-    # Resample to get ~60% low, 30% medium, 10% high
-    n_low, n_med, n_high = int(0.6 * n), int(0.3 * n), int(0.1 * n)
-    if len(low_idx) < n_low:
-        low_idx = np.random.choice(indices, n_low)
-    else:
-        low_idx = np.random.choice(low_idx, n_low, replace=False)
-    if len(med_idx) < n_med:
-        med_idx = np.random.choice(indices, n_med)
-    else:
-        med_idx = np.random.choice(med_idx, n_med, replace=False)
-    if len(high_idx) < n_high:
-        high_idx = np.random.choice(indices, n_high)
-    else:
-        high_idx = np.random.choice(high_idx, n_high, replace=False)
-    idx = np.concatenate([low_idx, med_idx, high_idx])
-    np.random.shuffle(idx)
+    picked = []
+    for label, share in (("low", 0.6), ("medium", 0.3), ("high", 0.1)):
+        pool, k = indices[risk == label], int(share * n)
+        # Too few rows of this class: draw from all rows with replacement (as before)
+        picked.append(rng.choice(indices, k) if len(pool) < k else rng.choice(pool, k, replace=False))
+    idx = np.concatenate(picked)
+    rng.shuffle(idx)
+    risk = risk[idx]
 
-    df = pd.DataFrame({
+    columns = {
         "age": age[idx],
-        "gender": [gender[i] for i in idx],
+        "gender": gender[idx],
         "heart_rate": heart_rate[idx],
         "blood_pressure_systolic": bp_sys[idx],
         "blood_pressure_diastolic": bp_dia[idx],
@@ -93,21 +98,24 @@ def generate_synthetic_data(n_samples: int = 2000) -> pd.DataFrame:
         "respiratory_rate": respiratory_rate[idx],
         "pain_score": pain_score[idx],
         "symptom_duration": symptom_duration[idx],
-        "risk": [risk[i] for i in idx],
-    })
+        "risk": risk,
+    }
 
-    # Add symptom columns (risk-correlated)
-    symptom_cols = [c.replace("symptom_", "") for c in ALL_FEATURES if c.startswith("symptom_")]
-    for s in symptom_cols:
-        df[f"symptom_{s}"] = 0
-    for i in range(len(df)):
-        r = df.iloc[i]["risk"]
-        n_symp = np.random.randint(1, 5) if r == "high" else (np.random.randint(1, 3) if r == "medium" else np.random.randint(0, 2))
-        chosen = np.random.choice(symptom_cols, min(n_symp, len(symptom_cols)), replace=False)
-        for s in chosen:
-            df.loc[df.index[i], f"symptom_{s}"] = 1
+    # Add symptom columns (risk-correlated): per-row counts drawn per risk class, then that many
+    # distinct symptoms taken from a random permutation of the symptom columns for each row
+    # SYMPTOM_COLUMNS, not every "symptom_*" feature: symptom_duration is a numeric vital
+    symptom_cols = SYMPTOM_COLUMNS
+    n_rows, n_symptoms = len(idx), len(symptom_cols)
+    n_symp = np.zeros(n_rows, dtype=np.int64)
+    for label, (low, high) in SYMPTOM_COUNT_RANGE.items():
+        rows = np.flatnonzero(risk == label)
+        n_symp[rows] = rng.integers(low, high, len(rows))
+    order = np.argsort(rng.random((n_rows, n_symptoms)), axis=1)
+    multi_hot = np.zeros((n_rows, n_symptoms), dtype=np.int8)
+    np.put_along_axis(multi_hot, order, np.arange(n_symptoms) < np.minimum(n_symp, n_symptoms)[:, None], axis=1)
+    columns.update({col: multi_hot[:, j] for j, col in enumerate(symptom_cols)})
 
-    return df
+    return pd.DataFrame(columns)
 
 
 def build_features(df: pd.DataFrame) -> pd.DataFrame:
@@ -118,13 +126,141 @@ def build_features(df: pd.DataFrame) -> pd.DataFrame:
     return X
 
 
-def train(n_samples: int = 2500, save_dataset: bool = True):
-    """Train and persist model + scaler. Saves dataset to data/triage_dataset.csv. Returns (model, scaler, summary)."""
+def export_compiled_forest(
+    model,
+    scaler: StandardScaler,
+    version: str,
+    df: pd.DataFrame | None = None,
+    model_dir: Path = MODEL_DIR,
+) -> CompiledForest:
+    """
+    Flatten the forest into arrays, fold the scaler into its split thresholds and save it as
+    memory-mappable .npy files. Before saving, checks that predictions on raw features are
+    identical to the scaled sklearn pipeline on the dataset (`df`, or data/triage_dataset.csv),
+    and that SHAP values from the exported arrays match SHAP on the sklearn model.
+    """
+    if df is None:
+        df = pd.read_csv(DATASET_PATH)
+    X_raw = build_features(df).to_numpy()
+    X_scaled = scaler.transform(X_raw)
+    compiled = CompiledForest.from_sklearn(model, version).fold_scaler(scaler)
+    verify_compiled_forest(model, compiled, X_scaled, X_raw)
+    try:
+        import shap
+    except ImportError:
+        shap = None
+    if shap is not None:
+        sample = X_scaled[:50]
+        expected = shap.TreeExplainer(model, feature_perturbation="interventional").shap_values(sample)
+        actual = shap.TreeExplainer(compiled.shap_model(), feature_perturbation="interventional").shap_values(sample)
+        if not np.array_equal(np.asarray(expected), np.asarray(actual)):
+            raise ValueError("SHAP values from the compiled forest differ from the sklearn model")
+    compiled.save(model_dir / COMPILED_FOREST_DIR)
+    print(f"Compiled forest (scaler folded) verified on {len(X_raw)} rows")
+    return compiled
+
+
+def export_existing_model(model_dir: Path | None = None) -> CompiledForest:
+    """Export the compiled forest for already-trained artifacts, the live version by default (--export-only)."""
+    import joblib
+    model_dir = model_dir or artifact_store.current_dir()
+    model = joblib.load(model_dir / "risk_model.joblib")
+    scaler = joblib.load(model_dir / "scaler.joblib")
+    with open(model_dir / "meta.json") as f:
+        meta = json.load(f)
+    return export_compiled_forest(model, scaler, meta["version"], model_dir=model_dir)
+
+
+def _grow_forest(model: RandomForestClassifier, X, y, n_trees: int, report, start: float, end: float) -> None:
+    """
+    Fit up to n_trees total, FIT_STEP_TREES at a time so progress can be reported; warm_start draws
+    the same per-tree seeds as a single fit, so the forest is identical.
+    """
+    first = len(getattr(model, "estimators_", []))
+    model.set_params(warm_start=True)
+    for target in range(first + FIT_STEP_TREES, n_trees + FIT_STEP_TREES, FIT_STEP_TREES):
+        model.set_params(n_estimators=min(target, n_trees))
+        model.fit(X, y)
+        report("fit", start + (end - start) * (model.n_estimators - first) / (n_trees - first))
+    # Serving scores a few rows per call: no thread pool per predict, and no warm_start in the artifact
+    model.set_params(warm_start=False, n_jobs=None)
+
+
+def _save_model(model, scaler, df: pd.DataFrame, score: float, model_dir: Path | None, meta_fields: dict, publish: bool, report):
+    """
+    Write joblibs, compiled forest and meta.json (last) into model_dir, or by default into a new
+    version in the artifact store. With publish the version is promoted and hot-swapped. Returns meta.
+    """
+    version = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    staged = model_dir is None
+    model_dir = artifact_store.staging_dir() if staged else model_dir
+    os.makedirs(model_dir, exist_ok=True)
+    import joblib
+    report("export", 0.85)
+    joblib.dump(model, model_dir / "risk_model.joblib")
+    joblib.dump(scaler, model_dir / "scaler.joblib")
+    export_compiled_forest(model, scaler, version, df, model_dir=model_dir)
+
+    meta = {
+        "feature_names": ALL_FEATURES,
+        "classes": list(model.classes_),
+        "test_accuracy": float(score),
+        "version": version,
+        "trained_at": datetime.utcnow().isoformat() + "Z",
+        **meta_fields,
+    }
+    with open(model_dir / "meta.json", "w") as f:
+        json.dump(meta, f, indent=2)
+
+    if publish:
+        report("publish", 0.95)
+        # Promote in the store (other processes follow the pointer) and hot-swap this process's model
+        from ml.registry import registry
+        registry.publish(model_dir, move=staged)
+    elif staged:
+        artifact_store.add(model_dir, move=True)  # Stored, not live; promote it later from the admin API
+    print(f"Model and scaler saved to {artifact_store.version_dir(version) if staged or publish else model_dir}")
+    return meta
+
+
+def train(
+    n_samples: int = 2500,
+    save_dataset: bool = True,
+    model_dir: Path | None = None,
+    publish: bool = True,
+    seed: int = 42,
+    n_jobs: int | None = None,
+    progress: Callable[[str, float], None] | None = None,
+    history: bool = False,
+    hyperparameters: dict | None = None,
+):
+    """
+    Train and persist model + scaler as a new version in the artifact store (or into model_dir).
+    Saves dataset to data/triage_dataset.csv and data/triage_dataset/ (columnar). With publish=False the new model is only written
+    (e.g. as a shadow candidate), not promoted.
+    n_jobs parallelizes the forest fit only; progress(stage, fraction) is called as training advances.
+    With history=True, triaged patient rows from the database are added to the synthetic corpus
+    and the checkpoint for later refresh() calls is recorded in meta.json. hyperparameters
+    override DEFAULT_HYPERPARAMETERS (e.g. a pick from ml.tuning).
+    Returns (model, scaler, summary).
+    """
+    report = progress or (lambda stage, fraction: None)
+    report("generate", 0.0)
     print("Generating synthetic data...")
-    df = generate_synthetic_data(n_samples)
+    df = generate_synthetic_data(n_samples, seed=seed)
     if save_dataset:
+        from ml.columnar_dataset import COLUMNAR_DATASET_DIR, write_columnar
         df.to_csv(DATASET_PATH, index=False)
-        print(f"Dataset saved to {DATASET_PATH}")
+        write_columnar(df, metadata={"source": "synthetic", "seed": seed})
+        print(f"Dataset saved to {DATASET_PATH} and {COLUMNAR_DATASET_DIR}")
+    history_fields = {}
+    if history:
+        from ml.patient_history import checkpoint, load_history
+        hist = load_history()
+        print(f"Patient history: {len(hist)} rows")
+        history_fields = {"history": {"mode": "full", "refreshes": 0, "checkpoint": checkpoint(hist)}}
+        df = pd.concat([df, hist[df.columns]], ignore_index=True)
+    report("features", 0.05)
     X = build_features(df)
     y = df["risk"].values
 
@@ -139,37 +275,21 @@ def train(n_samples: int = 2500, save_dataset: bool = True):
     class_weights = compute_class_weight("balanced", classes=classes, y=y_train)
     class_weight_dict = dict(zip(classes, class_weights))
 
-    model = RandomForestClassifier(
-        n_estimators=100,
-        max_depth=12,
-        min_samples_leaf=5,
-        class_weight=class_weight_dict,
-        random_state=42,
-    )
-    model.fit(X_train_scaled, y_train)
+    params = {**DEFAULT_HYPERPARAMETERS, **(hyperparameters or {})}
+    model = RandomForestClassifier(**params, class_weight=class_weight_dict, random_state=42, n_jobs=n_jobs)
+    _grow_forest(model, X_train_scaled, y_train, params["n_estimators"], report, 0.1, 0.8)
 
+    report("evaluate", 0.8)
     score = model.score(X_test_scaled, y_test)
     print(f"Test accuracy: {score:.3f}")
 
-    os.makedirs(MODEL_DIR, exist_ok=True)
-    import joblib
-    joblib.dump(model, MODEL_DIR / "risk_model.joblib")
-    joblib.dump(scaler, MODEL_DIR / "scaler.joblib")
-
     class_dist = {c: int((y == c).sum()) for c in model.classes_}
-    meta = {
-        "feature_names": ALL_FEATURES,
-        "classes": list(model.classes_),
-        "test_accuracy": float(score),
-        "version": datetime.utcnow().strftime("%Y%m%d%H%M"),
-        "trained_at": datetime.utcnow().isoformat() + "Z",
+    meta = _save_model(model, scaler, df, score, model_dir, {
         "synthetic_class_distribution": class_dist,
         "synthetic_total": int(len(df)),
-    }
-    with open(MODEL_DIR / "meta.json", "w") as f:
-        json.dump(meta, f, indent=2)
-
-    print(f"Model and scaler saved to {MODEL_DIR}")
+        "hyperparameters": params,
+        **history_fields,
+    }, publish, report)
     summary = {
         "test_accuracy": float(score),
         "class_distribution": class_dist,
@@ -177,8 +297,102 @@ def train(n_samples: int = 2500, save_dataset: bool = True):
         "version": meta["version"],
         "trained_at": meta["trained_at"],
     }
+    report("done", 1.0)
+    return model, scaler, summary
+
+
+def refresh(
+    base_dir: Path | None = None,
+    model_dir: Path | None = None,
+    new_trees: int = REFRESH_TREES,
+    max_trees: int = MAX_TREES,
+    publish: bool = True,
+    n_jobs: int | None = None,
+    progress: Callable[[str, float], None] | None = None,
+):
+    """
+    Incremental refresh: warm-start the model in base_dir (default: the live version) with new_trees extra trees fitted only on
+    patient rows newer than its history checkpoint (plus as many fresh synthetic rows, so every
+    class is present), keeping its scaler. Older history is never re-read. Falls back to a full
+    train(history=True) once the forest would exceed max_trees. When there are no new rows nothing
+    is written and summary["refreshed"] is False. Returns (model, scaler, summary).
+    """
+    import joblib
+
+    from ml.patient_history import checkpoint, load_history
+
+    report = progress or (lambda stage, fraction: None)
+    base_dir = base_dir or artifact_store.current_dir()
+    with open(base_dir / "meta.json") as f:
+        base_meta = json.load(f)
+    base_history = base_meta.get("history", {})
+    after_id = base_history.get("checkpoint", {}).get("last_id", 0)
+    model = joblib.load(base_dir / "risk_model.joblib")
+    scaler = joblib.load(base_dir / "scaler.joblib")
+
+    if len(model.estimators_) + new_trees > max_trees:
+        print(f"Forest would exceed {max_trees} trees; retraining from scratch on synthetic data + full history")
+        return train(save_dataset=False, model_dir=model_dir, publish=publish, n_jobs=n_jobs, progress=progress, history=True)
+
+    report("history", 0.0)
+    new = load_history(after_id=after_id)
+    print(f"Patient history: {len(new)} new rows since id {after_id}")
+    if new.empty:
+        report("done", 1.0)
+        return model, scaler, {"refreshed": False, "new_rows": 0, "version": base_meta["version"]}
+
+    # Anchor rows: all classes present (classes_ must not change under warm_start) and drift bounded
+    anchor = generate_synthetic_data(max(len(new), MIN_ANCHOR_ROWS), seed=after_id + len(new))
+    df = pd.concat([anchor, new[anchor.columns]], ignore_index=True)
+    report("features", 0.05)
+    X = scaler.transform(build_features(df))  # Existing trees split on this scale; never refit it
+    y = df["risk"].values
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+    model.set_params(n_jobs=n_jobs)
+    _grow_forest(model, X_train, y_train, len(model.estimators_) + new_trees, report, 0.1, 0.8)
+
+    report("evaluate", 0.8)
+    score = model.score(X_test, y_test)
+    print(f"Test accuracy on refresh data: {score:.3f} ({len(model.estimators_)} trees)")
+
+    new_dist = {c: int((new["risk"] == c).sum()) for c in model.classes_}
+    meta = _save_model(model, scaler, df, score, model_dir, {
+        "synthetic_class_distribution": base_meta.get("synthetic_class_distribution"),
+        "synthetic_total": base_meta.get("synthetic_total"),
+        "hyperparameters": {**base_meta.get("hyperparameters", DEFAULT_HYPERPARAMETERS), "n_estimators": len(model.estimators_)},
+        "history": {
+            "mode": "incremental",
+            "refreshes": base_history.get("refreshes", 0) + 1,
+            "base_version": base_meta["version"],
+            "checkpoint": checkpoint(new, base_history.get("checkpoint")),
+            "new_rows_class_distribution": new_dist,
+        },
+    }, publish, report)
+    summary = {
+        "refreshed": True,
+        "test_accuracy": float(score),
+        "new_rows": int(len(new)),
+        "new_rows_class_distribution": new_dist,
+        "n_trees": len(model.estimators_),
+        "base_version": base_meta["version"],
+        "version": meta["version"],
+        "trained_at": meta["trained_at"],
+    }
+    report("done", 1.0)
     return model, scaler, summary
 
 
 if __name__ == "__main__":
-    train()
+    import argparse
+    parser = argparse.ArgumentParser(description="Train the triage risk model.")
+    parser.add_argument("--export-only", action="store_true", help="Only export the compiled forest for the current model")
+    parser.add_argument("--history", action="store_true", help="Also train on triaged patient rows from the database")
+    parser.add_argument("--refresh", action="store_true", help="Incremental refresh from patient rows since the last checkpoint")
+    args = parser.parse_args()
+    if args.export_only:
+        export_existing_model()
+    elif args.refresh:
+        refresh()
+    else:
+        train(history=args.history)
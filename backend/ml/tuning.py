@@ -0,0 +1,177 @@
+"""Hyperparameter search for the risk forest: cross-validated accuracy and single-row latency per config."""
+
+import itertools
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import balanced_accuracy_score
+from sklearn.model_selection import StratifiedKFold
+from sklearn.utils.class_weight import compute_class_weight
+
+from ml.compiled_forest import CompiledForest
+from ml.train_model import DEFAULT_HYPERPARAMETERS, MODEL_DIR, build_features, generate_synthetic_data
+
+DEFAULT_GRID = {
+    "max_depth": [6, 8, 12, 16],
+    "n_estimators": [25, 50, 100, 200],
+    "min_samples_leaf": [1, 5, 10],
+}
+TUNING_REPORT_PATH = MODEL_DIR / "tuning.json"
+
+# Worker side: the dataset and fold indices, memory-mapped from the files the parent wrote once
+_shared: dict = {}
+
+
+def _init_worker(data_dir: str) -> None:
+    data = Path(data_dir)
+    _shared["X"] = np.load(data / "X.npy", mmap_mode="r")
+    _shared["y"] = np.load(data / "y.npy", mmap_mode="r")
+    _shared["folds"] = [
+        (np.load(data / f"train_{i}.npy", mmap_mode="r"), np.load(data / f"test_{i}.npy", mmap_mode="r"))
+        for i in range(len(list(data.glob("train_*.npy"))))
+    ]
+
+
+def _evaluate(params: dict) -> dict:
+    """Fit one config on every fold; return scores and the fold-0 forest flattened for latency timing."""
+    X, y = _shared["X"], _shared["y"]
+    accuracy, balanced, fit_s = [], [], []
+    compiled = None
+    for i, (train_idx, test_idx) in enumerate(_shared["folds"]):
+        y_train = y[train_idx]
+        classes = np.unique(y_train)
+        class_weight = dict(zip(classes, compute_class_weight("balanced", classes=classes, y=y_train)))
+        model = RandomForestClassifier(**params, class_weight=class_weight, random_state=42, n_jobs=1)
+        t0 = time.perf_counter()
+        model.fit(X[train_idx], y_train)
+        fit_s.append(time.perf_counter() - t0)
+        predicted = model.predict(X[test_idx])
+        accuracy.append(float(np.mean(predicted == y[test_idx])))
+        balanced.append(float(balanced_accuracy_score(y[test_idx], predicted)))
+        if i == 0:
+            compiled = CompiledForest.from_sklearn(model)
+    return {
+        "params": params,
+        "accuracy_mean": round(float(np.mean(accuracy)), 4),
+        "accuracy_std": round(float(np.std(accuracy)), 4),
+        "balanced_accuracy_mean": round(float(np.mean(balanced)), 4),
+        "fit_seconds_mean": round(float(np.mean(fit_s)), 3),
+        "n_nodes": int(len(compiled.feature)),
+        "_compiled": compiled,
+    }
+
+
+def _single_row_latency(compiled: CompiledForest, X: np.ndarray, n_calls: int) -> dict:
+    """Serving-path cost: one row per predict_proba call, as an admission scores it."""
+    rows = X[np.random.default_rng(0).integers(0, len(X), n_calls)]
+    for row in rows[:20]:
+        compiled.predict_proba(row[None, :])  # JIT and caches warm
+    samples = []
+    for row in rows:
+        t0 = time.perf_counter()
+        compiled.predict_proba(row[None, :])
+        samples.append(time.perf_counter() - t0)
+    ms = np.asarray(samples) * 1000
+    return {"p50_ms": round(float(np.percentile(ms, 50)), 4), "p95_ms": round(float(np.percentile(ms, 95)), 4)}
+
+
+def _mark_pareto(results: list[dict]) -> None:
+    """pareto=True for configs no other config beats on both accuracy and p50 latency."""
+    for r in results:
+        r["pareto"] = not any(
+            o["accuracy_mean"] >= r["accuracy_mean"] and o["latency"]["p50_ms"] <= r["latency"]["p50_ms"]
+            and (o["accuracy_mean"] > r["accuracy_mean"] or o["latency"]["p50_ms"] < r["latency"]["p50_ms"])
+            for o in results
+        )
+
+
+def search(
+    grid: dict[str, list] = DEFAULT_GRID,
+    n_samples: int = 2500,
+    seed: int = 42,
+    folds: int = 5,
+    workers: int | None = None,
+    latency_calls: int = 500,
+    max_latency_ms: float | None = None,
+) -> dict:
+    """
+    Evaluate every grid combination with stratified k-fold CV across a process pool. The data
+    and fold indices are computed once, written as .npy files and memory-mapped by each worker,
+    so nothing is re-split or re-sent per config. Latency is timed afterwards in this process,
+    one config at a time, so concurrent fits do not skew it. Trees are insensitive to the
+    StandardScaler, so configs are compared on raw features.
+    """
+    df = generate_synthetic_data(n_samples, seed=seed)
+    X = build_features(df).to_numpy()
+    y = df["risk"].to_numpy(dtype=str)
+    configs = [dict(zip(grid, values)) for values in itertools.product(*grid.values())]
+
+    data_dir = Path(tempfile.mkdtemp(prefix="triage-tuning-"))
+    try:
+        np.save(data_dir / "X.npy", X)
+        np.save(data_dir / "y.npy", y)
+        for i, (train_idx, test_idx) in enumerate(StratifiedKFold(folds, shuffle=True, random_state=seed).split(X, y)):
+            np.save(data_dir / f"train_{i}.npy", train_idx)
+            np.save(data_dir / f"test_{i}.npy", test_idx)
+
+        started = time.perf_counter()
+        with ProcessPoolExecutor(
+            max_workers=workers or os.cpu_count(),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(str(data_dir),),
+        ) as pool:
+            results = list(pool.map(_evaluate, configs))
+        search_s = time.perf_counter() - started
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    for r in results:
+        r["latency"] = _single_row_latency(r.pop("_compiled"), X, latency_calls)
+    _mark_pareto(results)
+    results.sort(key=lambda r: (-r["accuracy_mean"], r["latency"]["p50_ms"]))
+
+    eligible = [r for r in results if max_latency_ms is None or r["latency"]["p50_ms"] <= max_latency_ms]
+    current = next((r for r in results if r["params"] == DEFAULT_HYPERPARAMETERS), None)
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "config": {"n_samples": n_samples, "seed": seed, "folds": folds, "workers": workers or os.cpu_count(),
+                   "latency_calls": latency_calls, "max_latency_ms": max_latency_ms, "grid": grid},
+        "search_seconds": round(search_s, 1),
+        # Most accurate config within the latency budget (ties: faster first)
+        "recommended": eligible[0]["params"] if eligible else None,
+        "current": current,
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n-samples", type=int, default=2500)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None, help="Processes (default: all cores)")
+    parser.add_argument("--max-latency-ms", type=float, default=None, help="p50 single-row budget for the recommendation")
+    parser.add_argument("--grid", type=json.loads, default=DEFAULT_GRID, help="JSON {param: [values]}")
+    parser.add_argument("--output", type=Path, default=TUNING_REPORT_PATH)
+    parser.add_argument("--train", action="store_true", help="Train and publish the recommended config afterwards")
+    args = parser.parse_args()
+    report = search(args.grid, args.n_samples, args.seed, args.folds, args.workers, max_latency_ms=args.max_latency_ms)
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"{len(report['results'])} configs in {report['search_seconds']} s; report written to {args.output}")
+    for r in report["results"]:
+        if r["pareto"]:
+            print(f"  pareto {r['params']}: accuracy {r['accuracy_mean']:.4f}, p50 {r['latency']['p50_ms']} ms")
+    print(f"Recommended: {report['recommended']}")
+    if args.train and report["recommended"]:
+        from ml.train_model import train
+        train(hyperparameters=report["recommended"])
@@ -156,19 +156,48 @@ export async function exportCSV(risk?: string): Promise<Blob> {
   return r.blob()
 }
 
-export async function getSyntheticSummary(): Promise<{ summary: { test_accuracy?: number; class_distribution?: Record<string, number>; total_samples?: number; version?: string; trained_at?: string } | null; error?: string }> {
+export async function getSyntheticSummary(): Promise<{ summary: { test_accuracy?: number; class_distribution?: Record<string, number>; total_samples?: number; version?: string; trained_at?: string } | null; dataset?: { rows: number; class_distribution: Record<string, number>; mean_symptoms_by_risk: Record<string, number>; numeric: Record<string, { mean: number; std: number; min: number; max: number; mean_by_risk: Record<string, number> }> } | null; error?: string }> {
   const r = await fetch(`${BASE}/api/admin/synthetic/summary`, { headers: getHeaders() })
   if (!r.ok) throw new Error('Failed to fetch summary')
   return r.json()
 }
 
-export async function regenerateSynthetic(nSamples: number): Promise<{ ok: boolean; summary: unknown }> {
+export type AdminJob = {
+  id: string
+  kind: string
+  status: 'queued' | 'running' | 'succeeded' | 'failed'
+  stage: string | null
+  progress: number
+  summary: unknown
+  error: string | null
+  logs?: string[]
+}
+
+export async function getJob(jobId: string): Promise<AdminJob> {
+  const r = await fetch(`${BASE}/api/admin/jobs/${jobId}`, { headers: getHeaders() })
+  if (!r.ok) throw new Error('Failed to fetch job')
+  return r.json()
+}
+
+// Training runs as a background job; poll until it finishes
+export async function waitForJob(jobId: string, onProgress?: (job: AdminJob) => void, intervalMs = 1000): Promise<AdminJob> {
+  for (;;) {
+    const job = await getJob(jobId)
+    onProgress?.(job)
+    if (job.status === 'succeeded') return job
+    if (job.status === 'failed') throw new Error(job.error || 'Job failed')
+    await new Promise((resolve) => setTimeout(resolve, intervalMs))
+  }
+}
+
+export async function regenerateSynthetic(nSamples: number): Promise<AdminJob> {
   const r = await fetch(`${BASE}/api/admin/synthetic/regenerate?n_samples=${nSamples}`, {
     method: 'POST',
     headers: getHeaders()
   })
   if (!r.ok) throw new Error('Regenerate failed')
-  return r.json()
+  const { job_id } = await r.json()
+  return waitForJob(job_id)
 }
 
 export async function getModelInfo(): Promise<{ version?: string; test_accuracy?: number; trained_at?: string; classes?: string[]; error?: string }> {
@@ -177,13 +206,14 @@ export async function getModelInfo(): Promise<{ version?: string; test_accuracy?
   return r.json()
 }
 
-export async function retrainModel(nSamples = 2500): Promise<{ ok: boolean; summary: unknown }> {
+export async function retrainModel(nSamples = 2500): Promise<AdminJob> {
   const r = await fetch(`${BASE}/api/admin/model/retrain?n_samples=${nSamples}`, {
     method: 'POST',
     headers: getHeaders()
   })
   if (!r.ok) throw new Error('Retrain failed')
-  return r.json()
+  const { job_id } = await r.json()
+  return waitForJob(job_id)
 }
 
 // New Endpoints